@@ -0,0 +1,120 @@
+import streamlit as st
+import pandas as pd
+import auth
+import metrics
+import audio_ingest
+import page_profiler
+
+# -----------------------------
+# Call metrics (admins only)
+# -----------------------------
+# The same registry /metrics serves on the FastAPI backends, as seen by
+# this Streamlit process: one row per operation and page.
+
+def metrics_table():
+    histograms, counters = metrics.registry.snapshot()
+    rows = {}
+    for (name, labels), hist in histograms.items():
+        if name != "app_call_duration_seconds":
+            continue
+        labels = dict(labels)
+        rows[(labels["op"], labels["page"])] = {
+            "op": labels["op"],
+            "page": labels["page"] or "-",
+            "calls": hist.count,
+            "mean ms": hist.sum / hist.count * 1000 if hist.count else 0.0,
+            "p50 ms": hist.quantile(0.5) * 1000,
+            "p95 ms": hist.quantile(0.95) * 1000,
+            "errors": 0,
+            "cache hits": 0,
+            "cache misses": 0,
+            "tokens in": 0,
+            "tokens out": 0,
+            "leaders": 0,
+            "shared": 0,
+        }
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        row = rows.get((labels["op"], labels["page"]))
+        if row is None:
+            continue
+        if name == "app_call_errors_total":
+            row["errors"] += value
+        elif name == "app_cache_total":
+            row["cache hits" if labels["result"] == "hit" else "cache misses"] += value
+        elif name == "app_tokens_total":
+            row[f"tokens {labels['direction']}"] += value
+        elif name == "app_coalesce_total":
+            row["leaders" if labels["result"] == "leader" else "shared"] += value
+    table = pd.DataFrame(list(rows.values()))
+    if not table.empty:
+        lookups = table["cache hits"] + table["cache misses"]
+        table["hit rate"] = (table["cache hits"] / lookups.where(lookups > 0)).fillna(0.0)
+        flights = table["leaders"] + table["shared"]
+        table["coalesced"] = (table["shared"] / flights.where(flights > 0)).fillna(0.0)
+        table = table.sort_values(["op", "page"]).reset_index(drop=True)
+    return table
+
+def ingest_table():
+    """Recent audio ingests in this process, one row per label."""
+    stats = pd.DataFrame(audio_ingest.get_ingest_stats())
+    if stats.empty:
+        return stats
+    stats["ms"] = stats["seconds"] * 1000
+    stats["MB"] = stats["bytes"] / 1e6
+    stats["peak MB"] = stats["peak_bytes"].astype(float) / 1e6
+    return stats.groupby("label").agg(**{
+        "requests": ("ms", "size"),
+        "mean ms": ("ms", "mean"),
+        "max MB": ("MB", "max"),
+        "spooled": ("spooled", "sum"),
+        "max peak MB": ("peak MB", "max"),
+        "shared peaks": ("shared", "sum"),
+    }).reset_index()
+
+def show_metrics():
+    if not auth.is_admin(st.session_state.get("user")):
+        st.error("⚠️ This page is for admins only.")
+        return
+
+    st.title("📈 Call Metrics")
+    table = metrics_table()
+    if table.empty:
+        st.info("No calls recorded yet in this process.")
+    else:
+        st.dataframe(table.style.format({
+            "mean ms": "{:.1f}", "p50 ms": "{:.1f}", "p95 ms": "{:.1f}", "hit rate": "{:.0%}", "coalesced": "{:.0%}",
+        }), use_container_width=True)
+    st.subheader("🎙️ Audio ingest")
+    ingests = ingest_table()
+    if ingests.empty:
+        st.info("No recordings ingested yet in this process.")
+    else:
+        st.dataframe(ingests.style.format({"mean ms": "{:.1f}", "max MB": "{:.2f}", "max peak MB": "{:.2f}"}),
+                     use_container_width=True)
+        if not audio_ingest.TRACE_MEMORY:
+            st.caption("Start the app with AUDIO_TRACE_MEMORY=1 to record peak memory per request.")
+    st.subheader("⏱️ Page runs")
+    if not page_profiler.ENABLED:
+        st.caption("Start the app with PAGE_PROFILE=1 (or cprofile / pyinstrument) to time page runs.")
+    else:
+        pages = pd.DataFrame(page_profiler.page_report())
+        if pages.empty:
+            st.info("No page runs recorded yet.")
+        else:
+            st.dataframe(pages.style.format({c: "{:.1f}" for c in pages.columns if c.endswith("ms")}),
+                         use_container_width=True)
+        sessions = page_profiler.session_report()
+        if sessions:
+            st.caption(f"Reruns per page in the {len(sessions)} most recent sessions")
+            st.dataframe(pd.DataFrame.from_dict(sessions, orient="index").fillna(0).astype(int),
+                         use_container_width=True)
+        for wall, path in page_profiler.slowest_captures():
+            st.write(f"{wall * 1000:.0f} ms — `{path}`")
+
+    with st.expander("Prometheus text format"):
+        st.code(metrics.render(), language="text")
+    if st.button("Reset counters"):
+        metrics.registry.reset()
+        page_profiler.reset()
+        st.rerun()
@@ -1,33 +1,84 @@
 import os
-from groq import Groq
+import re
+import llm_gateway
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Identical question requests that may run at once when many learners
+# start the same interview together (see llm_gateway.SingleFlight).
+QUESTION_VARIETY = int(os.getenv("INTERVIEW_QUESTION_VARIETY", 4))
 
 def generate_question(role, difficulty):
     prompt = f"""
-    Generate one {difficulty} interview question for a {role}.
+    You are an expert HR interviewer.
+    Generate ONE {difficulty}-level interview question for a candidate applying as a {role}.
+    Respond with only the question text.
     """
-    res = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=150
+    # Every click should get a fresh question, so skip the response cache;
+    # only clicks that land while identical requests are in flight share.
+    return llm_gateway.ask(
+        prompt,
+        system="You are an experienced HR interviewer.",
+        max_tokens=150,
+        cache=False,
+        variety=QUESTION_VARIETY
     )
-    return res.choices[0].message.content.strip()
 
 
-def analyze_answer(answer):
-    prompt = f"""
-    Analyze this interview answer:
+ANALYSIS_SYSTEM = "You are a professional English and communication coach."
+
+
+def _analysis_prompt(answer):
+    return f"""
+    You are an interview coach analyzing this answer:
     "{answer}"
 
-    Give:
-    - Corrected grammar
-    - 2 suggestions
-    - Score /10
+    Provide:
+    1. Corrected grammar version
+    2. 2 short suggestions to improve clarity or confidence
+    3. Score out of 10 for communication & relevance
+    Keep the response short and easy to understand.
     """
-    res = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+
+
+def analyze_answer(answer):
+    return llm_gateway.ask(
+        _analysis_prompt(answer),
+        system=ANALYSIS_SYSTEM,
         max_tokens=300
     )
-    return res.choices[0].message.content.strip()
+
+
+def analyze_answer_stream(answer):
+    """Same as analyze_answer, but yields the feedback token by token."""
+    return llm_gateway.ask_stream(
+        _analysis_prompt(answer),
+        system=ANALYSIS_SYSTEM,
+        max_tokens=300,
+        label="interview_feedback"
+    )
+
+
+# "Score: 7/10", "7 out of 10", "Score: 7 (out of 10)", "Overall (/10): 7"
+# or "Score out of 10 for communication & relevance: 7"
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_SCORE_RE = re.compile(
+    rf"\(\s*/\s*10\s*\)\W*{_NUMBER}"
+    rf"|{_NUMBER}\s*(?:/|out of|\(\s*out of)\s*10"
+    rf"|out of 10\b[^\d\n]*{_NUMBER}",
+    re.I
+)
+
+
+def score_from_feedback(feedback):
+    """
+    Score out of 100 read from the "Overall" (or else "Score") line of a
+    feedback report, or None when the report has no usable score.
+    """
+    lines = [line for line in feedback.splitlines() if re.search(r"overall|score", line, re.I)]
+    lines.sort(key=lambda line: "overall" not in line.lower())
+    for line in lines:
+        match = _SCORE_RE.search(line)
+        if match:
+            value = float(next(group for group in match.groups() if group))
+            if 0 <= value <= 10:
+                return round(value * 10)
+    return None
@@ -1,11 +1,26 @@
+import importlib
 import streamlit as st
-import db, auth
-from initial_assessment import run_initial_assessment
-from speaking import speaking_practice
-from voice_practice import voice_practice
-from pronounce import pronounce_word
-from book_helper_ai import run_book_helper
-from dashboard import show_dashboard
+import db, auth, metrics, page_profiler
+
+# -----------------------------
+# Page registry
+# -----------------------------
+# page key -> (module, entry function). A page's module (and whatever it
+# pulls in: pandas, Plotly, PyPDF2, gTTS, groq...) is imported the first
+# time someone opens that page, not when the app starts.
+PAGES = {
+    "assessment": ("initial_assessment", "run_initial_assessment"),
+    "dashboard": ("dashboard", "show_dashboard"),
+    "speaking": ("speaking", "speaking_practice"),
+    "voice": ("voice_practice", "voice_practice"),
+    "pronounce": ("pronounce", "pronounce_word"),
+    "book": ("book_helper_ai", "run_book_helper"),
+    "admin": ("admin_metrics", "show_metrics"),
+}
+
+def load_page(page):
+    module_name, func_name = PAGES[page]
+    return getattr(importlib.import_module(module_name), func_name)
 
 # -----------------------------
 # Setup & Light Green Background
@@ -142,6 +157,9 @@ else:
         # Book Helper added back to navbar!
         pages = ["home", "assessment", "dashboard", "speaking", "voice", "pronounce", "book"]
         labels = ["🏠 Home", "🧩 Assessment", "📊 Dashboard", "💬 Speaking", "🎙️ Voice", "🔊 Pronounce", "📚 Book Helper"]
+        if auth.is_admin(st.session_state.user):
+            pages.append("admin")
+            labels.append("📈 Metrics")
 
         st.markdown("<div class='nav-container'>", unsafe_allow_html=True)
         nav_cols = st.columns(len(pages))
@@ -160,15 +178,9 @@ else:
     if st.session_state.page == "home":
         st.markdown("### 🏠 Welcome to AI English Lab Dashboard")
         st.info("Use the navigation bar to explore assessments, speaking, book helper, and more features.")
-    elif st.session_state.page == "assessment":
-        run_initial_assessment()
-    elif st.session_state.page == "dashboard":
-        show_dashboard()
-    elif st.session_state.page == "speaking":
-        speaking_practice()
-    elif st.session_state.page == "voice":
-        voice_practice()
-    elif st.session_state.page == "pronounce":
-        pronounce_word()
-    elif st.session_state.page == "book":
-        run_book_helper()
+    elif st.session_state.page in PAGES:
+        # Every outbound call and db query made by the page is labelled with it;
+        # with PAGE_PROFILE set, the run itself is timed (see page_profiler).
+        page = st.session_state.page
+        with metrics.page_context(page), page_profiler.profile(page):
+            load_page(page)()
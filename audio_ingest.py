@@ -0,0 +1,120 @@
+import os
+import time
+import wave
+import tempfile
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+import metrics
+
+# ------------------------------------
+# Audio ingest (no temp-file copies)
+# ------------------------------------
+# Whisper accepts a (filename, file-like) tuple, so recordings are handed
+# over straight from the upload buffer. Only FastAPI uploads larger than
+# SPOOL_THRESHOLD are spooled to disk while they are being read.
+
+SPOOL_THRESHOLD = int(os.getenv("AUDIO_SPOOL_THRESHOLD", 8 * 1024 * 1024))
+CHUNK_SIZE = 256 * 1024
+TRACE_MEMORY = os.getenv("AUDIO_TRACE_MEMORY", "0") == "1"
+
+# Recent ingests: label, size, whether it spooled, duration and peak memory.
+INGEST_STATS = deque(maxlen=500)
+
+_active_lock = threading.Lock()
+_active = {}   # id(stats) -> stats, for the requests being measured now
+
+def from_buffer(buffer, name: str = "audio.wav"):
+    """
+    Wraps an in-memory upload (Streamlit UploadedFile, BytesIO) for
+    the transcription call. The buffer itself is passed, not a copy.
+    """
+    buffer.seek(0)
+    return (name, buffer)
+
+def describe(upload):
+    """
+    (size in bytes, duration in seconds) of a (name, file) upload without
+    reading it into memory. Duration is 0.0 unless the file is a WAV.
+    """
+    file = upload[1] if isinstance(upload, tuple) else upload
+    start = file.tell()
+    try:
+        size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+        try:
+            with wave.open(file) as w:
+                seconds = w.getnframes() / float(w.getframerate() or 1)
+        except (wave.Error, EOFError):
+            seconds = 0.0
+        return size, seconds
+    finally:
+        file.seek(start)
+
+async def from_upload(upload, stats: dict | None = None, name: str | None = None):
+    """
+    Reads a FastAPI UploadFile in chunks. Small files stay in memory;
+    anything above SPOOL_THRESHOLD rolls over to a temporary file.
+    The caller should close the returned file object when done.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD)
+    size = 0
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        spool.write(chunk)
+        size += len(chunk)
+    spool.seek(0)
+    if stats is not None:
+        stats["bytes"] = size
+        stats["spooled"] = size > SPOOL_THRESHOLD
+    return (name or upload.filename or "audio.wav", spool)
+
+@contextmanager
+def measure(label: str):
+    """
+    Records duration, size and whether the upload spooled and, with
+    AUDIO_TRACE_MEMORY=1, peak Python memory for one request, in
+    INGEST_STATS and as app_ingest_* metrics.
+
+    tracemalloc's peak is process-wide: when requests overlap, each one's
+    peak covers all of them since the first began. Such figures are marked
+    shared (stats["shared"], label shared="true"); only unshared ones are
+    per request.
+    """
+    stats = {"label": label, "bytes": 0, "spooled": False, "peak_bytes": None, "shared": False}
+    with _active_lock:
+        if _active:
+            stats["shared"] = True
+            for other in _active.values():
+                other["shared"] = True
+        _active[id(stats)] = stats
+        if TRACE_MEMORY:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if not stats["shared"]:
+                tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats["seconds"] = time.perf_counter() - start
+        with _active_lock:
+            del _active[id(stats)]
+            if TRACE_MEMORY:
+                stats["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        INGEST_STATS.append(stats)
+        _export(stats)
+
+def _export(stats):
+    labels = {"label": stats["label"], "spooled": str(stats["spooled"]).lower()}
+    metrics.observe("app_ingest_seconds", stats["seconds"], **labels)
+    metrics.observe("app_ingest_bytes", stats["bytes"], metrics.BYTES_BUCKETS, **labels)
+    if stats["peak_bytes"] is not None:
+        metrics.observe("app_ingest_peak_bytes", stats["peak_bytes"], metrics.BYTES_BUCKETS,
+                        label=stats["label"], shared=str(stats["shared"]).lower())
+
+def get_ingest_stats(label: str | None = None):
+    return [s for s in INGEST_STATS if label is None or s["label"] == label]
@@ -1,6 +1,10 @@
+import os
 import hashlib
 import db
 
+# Comma-separated usernames that may open the admin pages.
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+
 def hash_pwd(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
@@ -18,3 +22,6 @@ def login(username, password):
     if stored == hash_pwd(password):
         return {"id": user[0], "username": user[1], "email": user[3]}
     return None
+
+def is_admin(user):
+    return bool(user) and user["username"] in ADMIN_USERS
@@ -0,0 +1 @@
+"""Offline benchmarks: a fake Groq server and load drivers for each flow."""
@@ -0,0 +1,133 @@
+"""
+SQLite access micro-benchmark: many Streamlit-like sessions (threads)
+hitting the database at once.
+
+    python -m benchmarks.bench_db --threads 1 4 16 --seconds 3
+
+"per-call" reproduces the old db.py pattern (connect, run one statement,
+commit, close). "pooled" uses the current db module: one WAL connection
+per thread with tuned pragmas and cached statements. Each operation is
+a mix of 8 reads (get_user / get_progress) to 2 writes (save_progress).
+"""
+import os
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+from contextlib import closing
+
+import db
+
+
+# -------------------------------
+# Old access pattern, for comparison
+# -------------------------------
+def legacy_get_user(path, username):
+    with closing(sqlite3.connect(path, check_same_thread=False)) as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM users WHERE username=?", (username,))
+        return c.fetchone()
+
+def legacy_save_progress(path, user_id, module, score, details):
+    with closing(sqlite3.connect(path, check_same_thread=False)) as conn:
+        c = conn.cursor()
+        c.execute("INSERT INTO progress (user_id, module, score, details) VALUES (?, ?, ?, ?)",
+                  (user_id, module, score, details))
+        conn.commit()
+
+def legacy_get_progress(path, user_id):
+    with closing(sqlite3.connect(path, check_same_thread=False)) as conn:
+        c = conn.cursor()
+        c.execute("SELECT module, score, details, timestamp FROM progress WHERE user_id=?", (user_id,))
+        return c.fetchall()
+
+
+# -------------------------------
+# Fixture
+# -------------------------------
+def seed(path, users=200, rows_per_user=20):
+    db.DB_PATH = path
+    db.init_db()
+    conn = db.get_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+            [(f"user{i}", "x" * 64, f"user{i}@example.com") for i in range(users)],
+        )
+        conn.executemany(
+            "INSERT INTO progress (user_id, module, score, details) VALUES (?, ?, ?, ?)",
+            [(u + 1, "speaking", 7.0, "details " * 20) for u in range(users) for _ in range(rows_per_user)],
+        )
+    db.close_conn()
+
+
+def one_op(style, path, rng, users):
+    uid = rng.randint(1, users)
+    roll = rng.random()
+    if style == "pooled":
+        if roll < 0.4:
+            db.get_user(f"user{uid - 1}")
+        elif roll < 0.8:
+            db.get_progress(uid)
+        else:
+            db.save_progress(uid, "speaking", 8.0, "bench")
+    else:
+        if roll < 0.4:
+            legacy_get_user(path, f"user{uid - 1}")
+        elif roll < 0.8:
+            legacy_get_progress(path, uid)
+        else:
+            legacy_save_progress(path, uid, "speaking", 8.0, "bench")
+
+
+def run(style, path, threads, seconds, users):
+    counts = [0] * threads
+    errors = [0] * threads
+    stop = time.perf_counter() + seconds
+
+    def worker(i):
+        rng = random.Random(i)
+        while time.perf_counter() < stop:
+            try:
+                one_op(style, path, rng, users)
+                counts[i] += 1
+            except sqlite3.OperationalError:
+                errors[i] += 1
+        if style == "pooled":
+            db.close_conn()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts) / seconds, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark db.py access patterns.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} {'per-call ops/s':>15} {'pooled ops/s':>13} {'speedup':>8}")
+    for threads in args.threads:
+        results = {}
+        for style in ("per-call", "pooled"):
+            folder = tempfile.mkdtemp(prefix="bench-db-")
+            path = os.path.join(folder, "bench.db")
+            seed(path, args.users)
+            if style == "per-call":
+                # The old code never enabled WAL: run it on a rollback journal.
+                with closing(sqlite3.connect(path)) as conn:
+                    conn.execute("PRAGMA journal_mode=DELETE")
+            results[style] = run(style, path, threads, args.seconds, args.users)
+        legacy, pooled = results["per-call"][0], results["pooled"][0]
+        print(f"{threads:>7} {legacy:>15.0f} {pooled:>13.0f} {pooled / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+End-to-end latency and throughput of every LLM-backed flow, offline,
+against the local fake Groq server.
+
+    python -m benchmarks.bench_flows
+    python -m benchmarks.bench_flows --flows speaking voice --concurrency 8
+    python -m benchmarks.bench_flows --save-baseline benchmarks/baselines/flows.json
+    python -m benchmarks.bench_flows --compare benchmarks/baselines/flows.json
+
+Flows:
+  speaking     speaking.chat_with_groq
+  voice        voice_practice question -> transcribe -> analyze
+  assessment   initial_assessment.analyze_initial_answer
+  book         book_summary.condense_book on a synthetic book
+  process      POST /process_audio on livekit_backend (uvicorn)
+
+Every call carries a unique prompt, so the LLM cache stays cold and the
+numbers measure the full path. A flow call that raises or returns a "⚠️"
+message counts as an error. --compare exits with status 1 when a flow's
+p95 grew, or its req/s fell, by more than --tolerance.
+"""
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import itertools
+import platform
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_groq import FakeGroqServer, FakeGroqConfig
+from benchmarks.bench_process_audio import silent_wav, use_fake_tts, start_backend, run_level, percentile
+
+FLOWS = ["speaking", "voice", "assessment", "book", "process"]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "flows.json")
+
+_ids = itertools.count()
+
+
+# -------------------------------
+# Flows (one call = one learner action)
+# -------------------------------
+def flow_speaking():
+    import speaking
+    history = [{"role": "user", "content": f"Hi, I would like to order a pizza, number {next(_ids)}."}]
+    return speaking.chat_with_groq(history, "Ordering Food at a Restaurant")
+
+def flow_voice(payload):
+    import voice_practice
+    voice_practice.generate_question("Data Scientist", "Medium")
+    transcript = voice_practice.transcribe_with_groq(("answer.wav", io.BytesIO(payload)))
+    if transcript.startswith("⚠️"):
+        return transcript
+    return voice_practice.analyze_answer(transcript)
+
+def flow_assessment():
+    import initial_assessment
+    answer = f"Yesterday I goes to the market and buyed some vegetables ({next(_ids)})."
+    return initial_assessment.analyze_initial_answer(answer, "📝 Typing Response")
+
+def flow_book(pages=12, words_per_page=700):
+    import book_summary
+    book = next(_ids)
+    text = " ".join(f"word{i % 97}" for i in range(words_per_page))
+    return book_summary.condense_book([f"Book {book}, page {p}. {text}" for p in range(pages)])
+
+
+def run_calls(call, total, concurrency):
+    latencies = []
+    errors = 0
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            result = call()
+            failed = isinstance(result, str) and result.startswith("⚠️")
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, failed in pool.map(one, range(total)):
+            latencies.append(latency)
+            errors += failed
+    return time.perf_counter() - start, latencies, errors
+
+
+def summarize(elapsed, latencies, errors):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+# -------------------------------
+# Baselines
+# -------------------------------
+def compare(results, baseline, tolerance, flows):
+    """Returns a list of human-readable regressions, counting a flow that was not compared as one."""
+    problems = []
+    for flow in flows:
+        now = results.get(flow)
+        before = baseline.get("flows", {}).get(flow)
+        if not now:
+            problems.append(f"{flow}: not measured in this run")
+            continue
+        if not before:
+            problems.append(f"{flow}: missing from the baseline")
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            problems.append(f"{flow}: p95 {before['p95_ms']:.0f} -> {now['p95_ms']:.0f} ms")
+        if now["rps"] < before["rps"] * (1 - tolerance):
+            problems.append(f"{flow}: req/s {before['rps']:.2f} -> {now['rps']:.2f}")
+        if now["errors"] > before["errors"]:
+            problems.append(f"{flow}: errors {before['errors']} -> {now['errors']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's LLM flows offline.")
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=FLOWS)
+    parser.add_argument("--requests", type=int, default=40, help="calls per flow (book: a tenth)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--transcribe-latency", type=float, default=0.3)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--save-baseline", metavar="PATH", nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    fake = FakeGroqServer(config=FakeGroqConfig(
+        latency=args.llm_latency,
+        tokens_per_sec=args.tokens_per_sec,
+        transcribe_latency=args.transcribe_latency,
+        error_rate=args.error_rate,
+        seed=0,
+    )).start()
+
+    # Everything below reads these when first imported.
+    scratch = tempfile.mkdtemp(prefix="bench-flows-")
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(scratch, "llm_cache.db")
+    os.environ["TTS_CACHE_DIR"] = os.path.join(scratch, "tts")
+    os.environ["SUMMARY_MAX_RPM"] = "0"
+    use_fake_tts(args.tts_latency)
+    payload = silent_wav()
+
+    calls = {
+        "speaking": flow_speaking,
+        "voice": lambda: flow_voice(payload),
+        "assessment": flow_assessment,
+        "book": flow_book,
+    }
+
+    results = {}
+    print(f"{'flow':<11} {'reqs':>5} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    try:
+        for flow in args.flows:
+            if flow == "process":
+                try:
+                    server = start_backend(args.port)
+                except ImportError as e:
+                    print(f"{flow:<11} skipped: {e}")
+                    continue
+                try:
+                    url = f"http://127.0.0.1:{args.port}/process_audio"
+                    elapsed, latencies, _, statuses = asyncio.run(
+                        run_level(url, args.concurrency, args.requests, payload)
+                    )
+                finally:
+                    server.should_exit = True
+                errors = sum(n for status, n in statuses.items() if status != 200)
+            else:
+                total = max(args.requests // 10, 2) if flow == "book" else args.requests
+                calls[flow]()  # warm-up: imports and the shared client are not measured
+                elapsed, latencies, errors = run_calls(calls[flow], total, args.concurrency)
+            stats = results[flow] = summarize(elapsed, latencies, errors)
+            print(f"{flow:<11} {stats['requests']:>5} {stats['errors']:>4} {stats['rps']:>7.2f} "
+                  f"{stats['p50_ms']:>8.0f} {stats['p95_ms']:>8.0f} {stats['p99_ms']:>8.0f}")
+    finally:
+        fake.stop()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare")},
+                "python": platform.python_version(),
+                "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "flows": results,
+            }, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.tolerance, args.flows)
+        if problems:
+            print(f"\nRegressions against {args.compare} (tolerance {args.tolerance:.0%}):")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
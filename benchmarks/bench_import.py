@@ -0,0 +1,70 @@
+"""
+Import-time benchmark for the Streamlit entry point and page modules.
+
+    python -m benchmarks.bench_import --runs 5
+    python -m benchmarks.bench_import --modules app dashboard --top 15
+
+Each module is imported in a fresh interpreter with `python -X importtime`
+(so nothing is already cached in sys.modules), and the cumulative time
+of the top-level import is reported as the median over --runs. --top
+lists the heaviest packages pulled in by the first module.
+"""
+import os
+import sys
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["app", "speaking", "voice_practice", "initial_assessment",
+                   "pronounce", "book_helper_ai", "dashboard"]
+
+
+def import_profile(module):
+    """{module name: (self us, cumulative us)} for one cold import."""
+    env = dict(os.environ, GROQ_API_KEY=os.getenv("GROQ_API_KEY", "bench"), PYTHONPATH=ROOT)
+    # Run from a scratch folder: importing app creates english_app.db in the cwd.
+    with tempfile.TemporaryDirectory() as scratch:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=scratch, env=env, capture_output=True, text=True,
+        )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time with -X importtime.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'module':<20} {'median ms':>10} {'min ms':>8}")
+    first_profile = None
+    for module in args.modules:
+        times = []
+        for _ in range(args.runs):
+            profile = import_profile(module)
+            first_profile = first_profile or profile
+            times.append(profile.get(module, (0, 0))[1] / 1000)
+        print(f"{module:<20} {statistics.median(times):>10.1f} {min(times):>8.1f}")
+
+    if args.top and first_profile:
+        # Top-level packages only (no dotted submodules), heaviest first.
+        packages = [(cum, name) for name, (_, cum) in first_profile.items()
+                    if "." not in name and name != args.modules[0]]
+        print(f"\nHeaviest imports under {args.modules[0]}:")
+        for cum, name in sorted(packages, reverse=True)[:args.top]:
+            print(f"  {name:<28} {cum / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
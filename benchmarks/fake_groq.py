@@ -0,0 +1,226 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) API.
+
+Serves /openai/v1/chat/completions (plain and streamed) and
+/openai/v1/audio/transcriptions with configurable latency, token rate
+and error injection, so benchmarks never touch the real API.
+
+    python -m benchmarks.fake_groq --port 8765 --latency 0.2
+
+Point the app at it with GROQ_BASE_URL=http://127.0.0.1:8765 and any
+GROQ_API_KEY.
+"""
+import json
+import time
+import random
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_WORDS = (
+    "Great answer! Try to speak a little slower and give one concrete "
+    "example from your last project. Score: 7/10."
+).split()
+
+
+class FakeGroqConfig:
+    def __init__(self, latency=0.2, tokens_per_sec=200.0, error_rate=0.0,
+                 transcribe_latency=0.3, reply_tokens=40, seed=None):
+        self.latency = latency                  # seconds before the first token
+        self.tokens_per_sec = tokens_per_sec    # streaming / generation speed
+        self.error_rate = error_rate            # share of requests answered with 500
+        self.transcribe_latency = transcribe_latency
+        self.reply_tokens = reply_tokens
+        self.random = random.Random(seed)
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeGroq/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    # -------------------------------
+    # Routing
+    # -------------------------------
+    def do_POST(self):
+        config = self.server.config
+        self.server.count(self.path)
+        body = self._read_body()
+
+        if config.error_rate and config.random.random() < config.error_rate:
+            self._send_json(500, {"error": {"message": "injected failure", "type": "server_error"}})
+            return
+
+        if self.path.endswith("/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        elif self.path.endswith("/audio/transcriptions"):
+            self._transcribe(body)
+        else:
+            self._send_json(404, {"error": {"message": f"unknown route {self.path}"}})
+
+    # -------------------------------
+    # Endpoints
+    # -------------------------------
+    def _chat(self, payload):
+        config = self.server.config
+        model = payload.get("model", "llama-3.1-8b-instant")
+        n_tokens = min(int(payload.get("max_tokens") or config.reply_tokens), config.reply_tokens)
+        tokens = [REPLY_WORDS[i % len(REPLY_WORDS)] + " " for i in range(n_tokens)]
+        reply_id = f"chatcmpl-{next(self.server.ids)}"
+        created = int(time.time())
+        per_token = 1.0 / config.tokens_per_sec if config.tokens_per_sec else 0.0
+
+        time.sleep(config.latency)
+
+        if not payload.get("stream"):
+            time.sleep(per_token * len(tokens))
+            self._send_json(200, {
+                "id": reply_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": len(json.dumps(payload.get("messages", []))) // 4,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": len(tokens),
+                },
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for i, token in enumerate(tokens):
+            chunk = {
+                "id": reply_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": token} if i == 0 else {"content": token},
+                    "finish_reason": None,
+                }],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(per_token)
+        last = {
+            "id": reply_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        self.wfile.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+
+    def _transcribe(self, body):
+        config = self.server.config
+        time.sleep(config.transcribe_latency)
+        # A counter keeps transcripts unique, so the LLM cache stays cold.
+        text = f"I worked on a data project last year, answer number {next(self.server.ids)}."
+        self._send_text(200, text + "\n")
+
+    # -------------------------------
+    # Helpers
+    # -------------------------------
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(parts)
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_text(self, status, text):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, config=None):
+        super().__init__((host, port), FakeGroqHandler)
+        self.config = config or FakeGroqConfig()
+        self.ids = itertools.count(1)
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self):
+        """Serves in a background thread and returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Groq API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--transcribe-latency", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FakeGroqConfig(
+        latency=args.latency,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        transcribe_latency=args.transcribe_latency,
+    )
+    server = FakeGroqServer(args.host, args.port, config)
+    print(f"Fake Groq listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Concurrent-learner load simulator for app.py, built on Streamlit's
+AppTest, against the local fake Groq server.
+
+    python -m benchmarks.load_app --learners 1 2 4 8 --rounds 3
+
+Each simulated learner is one AppTest session (its own session_state)
+driven from its own thread, all inside this one process, like sessions
+on a single Streamlit server. AppTest assumes one run at a time (it
+installs and then clears a global mock Runtime, and compiles the script
+on every run), so allow_concurrent_apptests() keeps a fallback Runtime
+in place while other sessions are mid-run and compiles app.py once. A learner signs up, logs in through the
+login form (auth.login) and then, each round, opens the dashboard,
+submits a typed and a recorded assessment answer, chats with the
+speaking partner, looks up a pronunciation, and records the practice
+through session_manager.update_practice.
+
+Per concurrency level it reports rerun latency per page action (p50 /
+p95), CPU use (process CPU time / wall time, 100% = one core), RSS
+growth, and SQLite write waits: time spent in db write calls (which
+includes waiting for the write lock) and "database is locked" errors.
+"""
+import os
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+from collections import defaultdict
+
+from benchmarks.fake_groq import FakeGroqServer, FakeGroqConfig
+from benchmarks.bench_process_audio import silent_wav, use_fake_tts, percentile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+DB_WRITES = ("add_user", "save_progress", "save_progress_many", "save_session")
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def allow_concurrent_apptests():
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    fallback = MagicMock(spec=Runtime)
+    fallback.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    fallback.cache_storage_manager = MemoryCacheStorageManager()
+    # A finished run sets Runtime._instance back to None; the others keep going.
+    Runtime.instance = classmethod(lambda cls: cls._instance or fallback)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    # Concurrent ast.parse calls can fail on CPython 3.11; share one compiled copy.
+    compiled = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_bytecode
+
+
+# -------------------------------
+# SQLite write timing
+# -------------------------------
+class WriteTimer:
+    """Wraps db write functions to time them and count lock errors."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.durations = []
+        self.locked = 0
+
+    def install(self):
+        import db
+        import sqlite3
+
+        for name in DB_WRITES:
+            original = getattr(db, name)
+
+            def timed(*args, _original=original, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if "locked" in str(e):
+                        with self.lock:
+                            self.locked += 1
+                    raise
+                finally:
+                    with self.lock:
+                        self.durations.append(time.perf_counter() - start)
+
+            setattr(db, name, timed)
+
+
+# -------------------------------
+# One learner
+# -------------------------------
+class Learner:
+    def __init__(self, n, latencies, errors, timeout):
+        self.username = f"learner{n}"
+        self.password = "pass1234"
+        self.latencies = latencies       # action -> [seconds]
+        self.errors = errors             # action -> count
+        self.timeout = timeout
+        self.at = None
+        self.n = n
+
+    def step(self, action, element=None):
+        """Runs one rerun (optionally after a widget change) and times it."""
+        start = time.perf_counter()
+        try:
+            if element is None:
+                self.at.run(timeout=self.timeout)
+            else:
+                element.run(timeout=self.timeout)
+        except Exception:
+            self.errors[action] += 1
+            return
+        self.latencies[action].append(time.perf_counter() - start)
+        if self.at.exception:
+            self.errors[action] += 1
+
+    def button(self, label):
+        return next(b for b in self.at.button if b.label == label)
+
+    def login(self):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        self.step("open")
+        self.at.text_input[0].input(self.username)
+        self.at.text_input[1].input(self.password)
+        self.step("login", self.button("Login").click())
+
+    def round(self, r, recording):
+        import session_manager
+        at = self.at
+
+        self.step("dashboard", at.button(key="dashboard").click())
+
+        self.step("assessment", at.button(key="assessment").click())
+        answer = f"My name is {self.username}. On weekends I likes reading and play football ({r})."
+        self.step("assessment_typed", at.text_area[0].input(answer))
+        self.step("assessment_voice", at.radio[0].set_value("🎤 Voice Response"))
+        if at.audio_input:
+            self.step("assessment_voice", at.audio_input[0].set_value(("answer.wav", recording, "audio/wav")))
+
+        self.step("speaking", at.button(key="speaking").click())
+        if any(b.label == "▶️ Start Conversation" for b in at.button):
+            self.step("speaking", self.button("▶️ Start Conversation").click())
+        at.text_input(key="user_message").input(f"I would like a table for two, please, {self.username} ({r}).")
+        self.step("speaking_send", self.button("Send").click())
+
+        self.step("pronounce", at.button(key="pronounce").click())
+        self.step("pronounce_word", at.text_input[0].input(f"vegetable{r % 3}"))
+
+        user_id = at.session_state.user["id"]
+        session_manager.update_practice(user_id, minutes=10, speaking_score=70 + r % 20, weak_area="grammar")
+
+
+def run_level(learners, rounds, recording, timeout, writes):
+    import progress_queue
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    crews = [Learner(n, latencies, errors, timeout) for n in range(learners)]
+
+    def drive(learner):
+        try:
+            learner.login()
+            for r in range(rounds):
+                learner.round(r, recording)
+        except Exception:
+            # A page did not render what the script expected; stop this learner.
+            errors["aborted"] += 1
+
+    writes.reset()
+    rss_before = rss_mb()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=drive, args=(learner,)) for learner in crews]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    progress_queue.flush()
+    wall = time.perf_counter() - start
+    return {
+        "wall": wall,
+        "cpu": (time.process_time() - cpu_before) / wall,
+        "rss_growth": rss_mb() - rss_before,
+        "latencies": latencies,
+        "errors": errors,
+        "writes": list(writes.durations),
+        "locked": writes.locked,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent learners on app.py.")
+    parser.add_argument("--learners", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--transcribe-latency", type=float, default=0.3)
+    parser.add_argument("--tts-latency", type=float, default=0.1)
+    parser.add_argument("--session-backend", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    fake = FakeGroqServer(config=FakeGroqConfig(
+        latency=args.llm_latency, transcribe_latency=args.transcribe_latency,
+    )).start()
+
+    scratch = tempfile.mkdtemp(prefix="load-app-")
+    os.chdir(scratch)  # app.py's database and caches live here
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(scratch, "llm_cache.db")
+    os.environ["TTS_CACHE_DIR"] = os.path.join(scratch, "tts")
+    os.environ["SESSION_BACKEND"] = args.session_backend
+    use_fake_tts(args.tts_latency)
+    allow_concurrent_apptests()
+
+    import db
+    import auth
+    db.DB_PATH = os.path.join(scratch, "english_app.db")
+    db.init_db()
+    writes = WriteTimer()
+    writes.install()
+    for n in range(max(args.learners)):
+        auth.signup(f"learner{n}", "pass1234", f"learner{n}@example.com")
+
+    recording = silent_wav(seconds=1.0)
+    try:
+        for level in args.learners:
+            result = run_level(level, args.rounds, recording, args.timeout, writes)
+            actions = sum(len(v) for v in result["latencies"].values())
+            writes_ms = [d * 1000 for d in result["writes"]]
+            print(f"\n== {level} learner(s): {actions} reruns in {result['wall']:.1f}s, "
+                  f"CPU {result['cpu']:.0%}, RSS +{result['rss_growth']:.1f} MB, "
+                  f"db writes {len(writes_ms)} (p95 {percentile(writes_ms, 95):.1f} ms, "
+                  f"max {max(writes_ms, default=0):.1f} ms, locked {result['locked']}), "
+                  f"learners aborted {result['errors']['aborted']}")
+            print(f"   {'action':<18} {'n':>4} {'err':>4} {'p50 ms':>8} {'p95 ms':>8}")
+            for action, values in result["latencies"].items():
+                print(f"   {action:<18} {len(values):>4} {result['errors'][action]:>4} "
+                      f"{statistics.median(values) * 1000:>8.0f} {percentile(values, 95) * 1000:>8.0f}")
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
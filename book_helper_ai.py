@@ -1,46 +1,55 @@
 import streamlit as st
-import PyPDF2
-import tempfile
-import os
-from dotenv import load_dotenv
-from groq import Groq
-from gtts import gTTS
-import base64
-
-# ---------------------------------
-# Setup
-# ---------------------------------
-load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+import book_store
+import book_summary
+import book_index
+import llm_gateway
+import tts
 
 # ---------------------------------
 # Helper Functions
 # ---------------------------------
 def extract_text_from_pdf(file):
-    """Extracts text content from a PDF."""
-    pdf_reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text() or ""
-    return text.strip()
-
-def speak_text(text, filename="output.mp3"):
-    """Converts text to speech and returns file path."""
-    tts = gTTS(text=text, lang='en')
-    tts.save(filename)
-    return filename
+    """Extracts text content from a PDF (cached by file content)."""
+    _, pages = book_store.load_book(file.read())
+    return book_store.join_pages(pages)
+
+def load_uploaded_book(uploaded_file):
+    """
+    Returns the book text, parsing the PDF only when a new file
+    (by content hash) is uploaded in this session.
+    """
+    data = uploaded_file.getvalue()
+    bid = book_store.book_id(data)
+    if st.session_state.get("book_id") != bid:
+        _, pages = book_store.load_book(data)
+        st.session_state.book_id = bid
+        st.session_state.book_pages = pages
+        st.session_state.book_text = book_store.join_pages(pages)
+    return st.session_state.book_text
+
+def book_passages(query, k=3):
+    """Top-k passages of the current book for a query, formatted for a prompt."""
+    index = book_index.get_index(st.session_state.book_id, st.session_state.book_pages)
+    return book_index.format_passages(index.search(query, k))
+
+def speak_text(text):
+    """Converts text to speech and returns MP3 bytes (cached by content)."""
+    return tts.synthesize(text)
+
+READER_SYSTEM = "You are a friendly and intelligent reading assistant who explains stories clearly and interactively."
 
 def chat_with_ai(prompt):
     """Sends a message to the Groq model and returns response."""
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": "You are a friendly and intelligent reading assistant who explains stories clearly and interactively."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=500
-    )
-    return response.choices[0].message.content.strip()
+    return llm_gateway.ask(prompt, system=READER_SYSTEM, max_tokens=500)
+
+def chat_with_ai_stream(prompt, label="book_helper"):
+    """Streams the model's answer piece by piece, for st.write_stream."""
+    try:
+        yield from llm_gateway.ask_stream(
+            prompt, system=READER_SYSTEM, max_tokens=500, label=label
+        )
+    except Exception as e:
+        yield f"⚠️ Error: {str(e)}"
 
 # ---------------------------------
 # Streamlit UI
@@ -75,14 +84,7 @@ def run_book_helper():
     uploaded_file = st.file_uploader("📘 Upload your book (PDF only):", type=["pdf"])
 
     if uploaded_file:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(uploaded_file.read())
-            tmp_path = tmp.name
-
-        with open(tmp_path, "rb") as f:
-            book_text = extract_text_from_pdf(f)
-
-        st.session_state.book_text = book_text
+        book_text = load_uploaded_book(uploaded_file)
         st.success("✅ Book uploaded successfully!")
 
         preview = book_text[:1500] + "..." if len(book_text) > 1500 else book_text
@@ -90,16 +92,27 @@ def run_book_helper():
 
         st.subheader("🎧 Story Summary")
         if st.button("Summarize Story"):
-            with st.spinner("AI reading and summarizing your story..."):
-                summary_prompt = f"Summarize the story below in a simple and emotional storytelling way that a reader can easily understand:\n\n{book_text[:7000]}"
-                summary = chat_with_ai(summary_prompt)
-                st.session_state.story_summary = summary
-
+            # Map-reduce over the whole book, then one storytelling pass.
+            progress = st.progress(0.0, text="📖 Reading your book...")
+
+            def show_progress(done, total, level):
+                stage = "Reading" if level == 0 else "Combining"
+                progress.progress(done / total, text=f"📖 {stage} part {done} of {total}...")
+
+            try:
+                notes = book_summary.condense_book(st.session_state.book_pages, on_progress=show_progress)
+            except Exception as e:
+                st.error(f"⚠️ Error summarizing book: {e}")
+                st.stop()
+            progress.empty()
+
+            summary_prompt = f"Summarize the story below in a simple and emotional storytelling way that a reader can easily understand:\n\n{notes}"
+            summary = st.write_stream(chat_with_ai_stream(summary_prompt, label="book_summary"))
+            st.session_state.story_summary = summary
             st.success("✨ Story summarized successfully!")
-            st.markdown(f"<div class='assistant-bubble'>{summary}</div>", unsafe_allow_html=True)
 
-            audio_path = speak_text(summary)
-            st.audio(audio_path, format="audio/mp3")
+            audio_bytes = speak_text(summary)
+            st.audio(audio_bytes, format="audio/mp3")
 
         # ---------------------------------
         # Word Understanding Section
@@ -108,10 +121,12 @@ def run_book_helper():
         user_word = st.text_input("Enter a word from the book you'd like to understand:")
         if st.button("Explain Word"):
             meaning_prompt = f"Explain the meaning of the word '{user_word}' in simple terms with a short example."
-            meaning = chat_with_ai(meaning_prompt)
-            st.markdown(f"<div class='assistant-bubble'>{meaning}</div>", unsafe_allow_html=True)
-            audio_path = speak_text(meaning)
-            st.audio(audio_path, format="audio/mp3")
+            passages = book_passages(user_word)
+            if passages:
+                meaning_prompt += f" Explain it as it is used in these passages from the book:\n\n{passages}"
+            meaning = st.write_stream(chat_with_ai_stream(meaning_prompt, label="book_word"))
+            audio_bytes = speak_text(meaning)
+            st.audio(audio_bytes, format="audio/mp3")
 
         # ---------------------------------
         # Reader Engagement & Analysis
@@ -121,10 +136,9 @@ def run_book_helper():
         user_reflection = st.text_area("✍️ Type your thoughts here...")
 
         if st.button("Analyze My Understanding"):
-            with st.spinner("Analyzing your response..."):
-                analyze_prompt = f"Here’s a summary of a story: {st.session_state.get('story_summary', '')}\n\nUser reflection: {user_reflection}\n\nEvaluate how deeply the user understood the story, highlight their emotional connection, and suggest one similar story/book they might enjoy next."
-                feedback = chat_with_ai(analyze_prompt)
-                st.markdown(f"<div class='assistant-bubble'>{feedback}</div>", unsafe_allow_html=True)
-                audio_path = speak_text(feedback)
-                st.audio(audio_path, format="audio/mp3")
+            passages = book_passages(user_reflection)
+            analyze_prompt = f"Here’s a summary of a story: {st.session_state.get('story_summary', '')}\n\nPassages from the book related to the reflection:\n{passages}\n\nUser reflection: {user_reflection}\n\nEvaluate how deeply the user understood the story, highlight their emotional connection, and suggest one similar story/book they might enjoy next."
+            feedback = st.write_stream(chat_with_ai_stream(analyze_prompt, label="book_reflection"))
+            audio_bytes = speak_text(feedback)
+            st.audio(audio_bytes, format="audio/mp3")
 
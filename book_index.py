@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from scipy import sparse
+import book_store
+
+# ---------------------------------
+# BM25 passage index per book
+# ---------------------------------
+# Built once per book hash from the cached pages and stored next to
+# them (index.npz, vocab.json, passages.jsonl), so prompts can include
+# the few passages that matter instead of the whole book.
+
+PASSAGE_WORDS = int(os.getenv("BOOK_PASSAGE_WORDS", 120))
+K1 = 1.5
+B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have he her his i in is it its "
+    "of on or she that the their them they this to was were will with you your".split()
+)
+
+def tokenize(text: str):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+def split_passages(pages, words=PASSAGE_WORDS):
+    """Cuts pages into (page_number, text) windows of about `words` words."""
+    passages = []
+    for page_no, page in enumerate(pages, start=1):
+        tokens = page.split()
+        for start in range(0, len(tokens), words):
+            chunk = " ".join(tokens[start:start + words])
+            if chunk:
+                passages.append((page_no, chunk))
+    return passages
+
+
+class BookIndex:
+    def __init__(self, weights, vocab, passages):
+        self.weights = weights.tocsc()   # passages x terms, BM25 weight per cell
+        self.vocab = vocab               # term -> column
+        self.passages = passages         # [(page_number, text)]
+
+    @classmethod
+    def build(cls, pages):
+        passages = split_passages(pages)
+        vocab = {}
+        rows, cols = [], []
+        lengths = np.zeros(len(passages), dtype=np.float32)
+        for row, (_, text) in enumerate(passages):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            for term in tokens:
+                rows.append(row)
+                cols.append(vocab.setdefault(term, len(vocab)))
+
+        shape = (len(passages), max(len(vocab), 1))
+        data = np.ones(len(rows), dtype=np.float32)
+        tf = sparse.coo_matrix((data, (rows, cols)), shape=shape).tocsr()
+        tf.sum_duplicates()
+
+        # BM25: idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avgdl))
+        n_docs = max(len(passages), 1)
+        df = np.bincount(tf.indices, minlength=shape[1]).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avgdl = float(lengths.mean()) if len(passages) else 1.0
+        norm = K1 * (1 - B + B * lengths / max(avgdl, 1.0))
+        row_of = np.repeat(np.arange(shape[0]), np.diff(tf.indptr))
+        tf.data = idf[tf.indices] * tf.data * (K1 + 1) / (tf.data + norm[row_of])
+        return cls(tf, vocab, passages)
+
+    def search(self, query: str, k: int = 4):
+        """Returns up to k (page_number, text, score) passages, best first."""
+        terms = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not terms:
+            return []
+        scores = np.asarray(self.weights[:, sorted(terms)].sum(axis=1)).ravel()
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.passages[i][0], self.passages[i][1], float(scores[i])) for i in top]
+
+    # ---------------------------------
+    # Persistence
+    # ---------------------------------
+    def save(self, folder: str):
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".npz")
+        os.close(fd)
+        sparse.save_npz(tmp_path, self.weights.tocsr())
+        # Every file is renamed into place whole, so a reader never sees one
+        # half-written by another process building the same book.
+        _write_replacing(folder, "vocab.json", lambda f: json.dump(self.vocab, f))
+        _write_replacing(folder, "passages.jsonl", lambda f: f.writelines(
+            json.dumps([page_no, text], ensure_ascii=False) + "\n" for page_no, text in self.passages
+        ))
+        # The matrix is renamed into place last: its presence marks a complete index.
+        os.replace(tmp_path, os.path.join(folder, "index.npz"))
+
+    @classmethod
+    def load(cls, folder: str):
+        weights = sparse.load_npz(os.path.join(folder, "index.npz"))
+        with open(os.path.join(folder, "vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(folder, "passages.jsonl"), encoding="utf-8") as f:
+            passages = [tuple(json.loads(line)) for line in f]
+        return cls(weights, vocab, passages)
+
+
+def _write_replacing(folder, name, write):
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        write(f)
+    os.replace(tmp_path, os.path.join(folder, name))
+
+
+# ---------------------------------
+# Per-process access
+# ---------------------------------
+_loaded = OrderedDict()
+_lock = threading.Lock()
+MAX_LOADED = 8
+
+def get_index(bid: str, pages=None) -> BookIndex:
+    """
+    Returns the index for a book id: from memory, from disk, or built
+    from `pages` (or the cached pages) on first use.
+    """
+    with _lock:
+        if bid in _loaded:
+            _loaded.move_to_end(bid)
+            return _loaded[bid]
+
+    folder = book_store.book_dir(bid)
+    if os.path.exists(os.path.join(folder, "index.npz")):
+        index = BookIndex.load(folder)
+    else:
+        if pages is None:
+            pages = list(book_store.iter_cached_pages(bid))
+        index = BookIndex.build(pages)
+        index.save(folder)
+
+    with _lock:
+        _loaded[bid] = index
+        while len(_loaded) > MAX_LOADED:
+            _loaded.popitem(last=False)
+    return index
+
+def format_passages(hits) -> str:
+    return "\n\n".join(f"[page {page}] {text}" for page, text, _ in hits)
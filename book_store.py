@@ -0,0 +1,98 @@
+import io
+import os
+import json
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import metrics
+
+# ---------------------------------
+# Content-addressed book store
+# ---------------------------------
+# Each uploaded PDF is identified by the sha256 of its bytes. Pages are
+# extracted once and written to <BOOK_CACHE_DIR>/<book_id>/pages.jsonl
+# (one JSON string per page), so reruns and other users uploading the
+# same book read the cached text instead of re-parsing the PDF.
+
+BOOK_CACHE_DIR = os.getenv("BOOK_CACHE_DIR", os.path.join(".cache", "books"))
+PARALLEL_MIN_PAGES = int(os.getenv("BOOK_PARALLEL_MIN_PAGES", 60))
+MAX_WORKERS = int(os.getenv("BOOK_EXTRACT_WORKERS", os.cpu_count() or 2))
+
+def book_id(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def book_dir(bid: str) -> str:
+    return os.path.join(BOOK_CACHE_DIR, bid)
+
+def pages_path(bid: str) -> str:
+    return os.path.join(book_dir(bid), "pages.jsonl")
+
+# ---------------------------------
+# Extraction
+# ---------------------------------
+def iter_pages(data: bytes, start: int = 0, stop: int | None = None):
+    """Yields the text of each page, one page at a time."""
+    import PyPDF2  # only needed when a book is not cached yet
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    for page in reader.pages[start:stop]:
+        yield page.extract_text() or ""
+
+def _extract_range(job):
+    data, start, stop = job
+    return list(iter_pages(data, start, stop))
+
+def extract_pages(data: bytes):
+    """
+    Extracts every page. Long books are split into page ranges and
+    parsed in parallel across a process pool.
+    """
+    import PyPDF2
+
+    page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    if page_count < PARALLEL_MIN_PAGES or MAX_WORKERS < 2:
+        yield from iter_pages(data)
+        return
+
+    step = -(-page_count // MAX_WORKERS)
+    jobs = [(data, start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        for pages in pool.map(_extract_range, jobs):
+            yield from pages
+
+# ---------------------------------
+# Cache
+# ---------------------------------
+def iter_cached_pages(bid: str):
+    """Yields cached page texts for a book id."""
+    with open(pages_path(bid), encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+def is_cached(bid: str) -> bool:
+    return os.path.exists(pages_path(bid))
+
+def _write_pages(bid: str, pages):
+    folder = book_dir(bid)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for text in pages:
+            f.write(json.dumps(text, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, pages_path(bid))
+
+def load_book(data: bytes):
+    """
+    Returns (book_id, pages) for the PDF bytes, extracting and caching
+    the pages on first sight of this content.
+    """
+    bid = book_id(data)
+    with metrics.timed("pdf.extract") as call:
+        call["bytes"] = len(data)
+        call["cache"] = "hit" if is_cached(bid) else "miss"
+        if call["cache"] == "miss":
+            _write_pages(bid, extract_pages(data))
+        return bid, list(iter_cached_pages(bid))
+
+def join_pages(pages) -> str:
+    return "\n".join(pages).strip()
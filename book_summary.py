@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import llm_gateway
+import metrics
+
+# ---------------------------------
+# Map-reduce book summarisation
+# ---------------------------------
+# The book is split into token-bounded chunks, each chunk is summarised
+# concurrently (under a requests-per-minute limit), and the summaries
+# are merged level by level until they fit in a single prompt. Every
+# call goes through llm_gateway, whose cache is keyed by the prompt
+# content, so re-summarising or resuming a book repeats no calls.
+
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 2500))
+FINAL_TOKENS = int(os.getenv("SUMMARY_FINAL_TOKENS", 3000))
+MAX_PARALLEL = int(os.getenv("SUMMARY_MAX_PARALLEL", 4))
+MAX_RPM = int(os.getenv("SUMMARY_MAX_RPM", 30))
+
+CHUNK_SYSTEM = "You summarise parts of a story accurately and briefly, keeping names, events and feelings."
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text.
+    return len(text) // 4 + 1
+
+# ---------------------------------
+# Chunking
+# ---------------------------------
+def chunk_text(pieces, max_tokens=CHUNK_TOKENS):
+    """
+    Packs pieces (pages or summaries) into chunks of at most
+    max_tokens; oversized pieces are cut into slices first.
+    """
+    max_chars = max_tokens * 4
+    chunks = []
+    current = []
+    size = 0
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        slices = [piece[i:i + max_chars] for i in range(0, len(piece), max_chars)]
+        for part in slices:
+            tokens = estimate_tokens(part)
+            if current and size + tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(part)
+            size += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+# ---------------------------------
+# Rate limiting
+# ---------------------------------
+class RateLimiter:
+    """Spaces calls so no more than `per_minute` start in any minute."""
+
+    def __init__(self, per_minute=MAX_RPM):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+# ---------------------------------
+# Map and reduce
+# ---------------------------------
+def summarize_chunk(chunk: str, limiter: RateLimiter | None = None) -> str:
+    prompt = f"Summarise this part of a story in 5-8 sentences:\n\n{chunk}"
+    # Cached chunks cost nothing and do not count against the rate limit.
+    if limiter and llm_gateway.peek(prompt, system=CHUNK_SYSTEM, max_tokens=350) is None:
+        limiter.wait()
+    return llm_gateway.ask(prompt, system=CHUNK_SYSTEM, max_tokens=350)
+
+def _map(chunks, limiter, on_progress, level):
+    results = [None] * len(chunks)
+    done = 0
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL) as pool:
+        futures = {
+            pool.submit(metrics.bind_page(summarize_chunk), chunk, limiter): i
+            for i, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if on_progress:
+                on_progress(done, len(chunks), level)
+    return results
+
+def condense_book(pages, on_progress=None) -> str:
+    """
+    Reduces the whole book to notes short enough for one final prompt.
+    on_progress(done, total, level) is called in the caller's thread as
+    each chunk finishes; level 0 is the first pass over the book text.
+    """
+    text_tokens = sum(estimate_tokens(p) for p in pages)
+    if text_tokens <= FINAL_TOKENS:
+        return "\n\n".join(p.strip() for p in pages if p.strip())
+
+    limiter = RateLimiter()
+    pieces = list(pages)
+    level = 0
+    while True:
+        chunks = chunk_text(pieces)
+        summaries = _map(chunks, limiter, on_progress, level)
+        if sum(estimate_tokens(s) for s in summaries) <= FINAL_TOKENS or len(summaries) == 1:
+            return "\n\n".join(summaries)
+        pieces = summaries
+        level += 1
@@ -2,40 +2,42 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+from datetime import datetime, timezone
+import db
 
-def show_dashboard():
-    st.title("📊 Your AI English Lab Dashboard")
-
-    st.markdown("""
-    ### 🧠 Learning Overview
-    Track your daily progress, assessment scores, and speaking improvements below.
-    """)
+DAYS = 14
 
-    # -----------------------------
-    # Sample data (replace later with user-specific data)
-    # -----------------------------
-    np.random.seed(42)
-    days = pd.date_range(end=pd.Timestamp.today(), periods=14)
-    practice_time = np.random.randint(10, 60, size=14)
-    speaking_score = np.random.randint(60, 95, size=14)
+# -----------------------------
+# Cached data and figures
+# -----------------------------
+# Keyed by user, by db.get_data_version(user), which every progress
+# write bumps, and by the UTC date the window ends on: reruns and widget
+# clicks reuse the cached frame and figure until new progress arrives
+# or the day changes.
 
-    data = pd.DataFrame({
-        "Day": days.strftime("%b %d"),
-        "Practice Time (min)": practice_time,
-        "Speaking Score": speaking_score
-    })
+def utc_today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
 
-    st.write("#### 🕒 Your Practice Summary (Past 2 Weeks)")
-    st.dataframe(data, use_container_width=True)
+@st.cache_data(max_entries=512, show_spinner=False)
+def load_daily(user_id, version, today, days=DAYS):
+    rows = db.get_daily_practice(user_id, days)
+    daily = pd.DataFrame(rows, columns=["day", "attempts", "scored", "score", "minutes"])
+    daily["day"] = pd.to_datetime(daily["day"])
+    # One row per calendar day, zeros for days without practice
+    all_days = pd.date_range(end=pd.Timestamp(today), periods=days)
+    daily = daily.set_index("day").reindex(all_days, fill_value=0).fillna(0)
+    daily.index.name = "day"
+    return daily
 
-    # -----------------------------
-    # 3D Learning Streak Visualization
-    # -----------------------------
-    st.markdown("### 🌟 3D Learning Streak Visualization")
+@st.cache_resource(max_entries=256, show_spinner=False)
+def build_surface(user_id, version, today, days=DAYS):
+    daily = load_daily(user_id, version, today, days)
+    practice_time = daily["minutes"].to_numpy(dtype=float)
+    speaking_score = daily["score"].to_numpy(dtype=float)
 
     # Create meshgrid for a proper 3D surface
-    x = np.arange(1, len(data) + 1)
-    y = np.linspace(0, 1, len(data))
+    x = np.arange(1, len(daily) + 1)
+    y = np.linspace(0, 1, len(daily))
     X, Y = np.meshgrid(x, y)
 
     # Create a smooth Z surface (mix practice and score)
@@ -64,20 +66,71 @@ def show_dashboard():
         height=600,
         margin=dict(l=0, r=0, b=0, t=50),
     )
+    return fig
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def summary_metrics(user_id, version, today, days=DAYS):
+    daily = load_daily(user_id, version, today, days)
+    minutes = daily["minutes"].to_numpy(dtype=float)
+    scores = daily["score"].to_numpy(dtype=float)
+    scored = daily["scored"].to_numpy(dtype=float)
+    attempts = daily["attempts"].to_numpy(dtype=float)
+
+    avg_time = float(minutes.mean()) if len(minutes) else 0.0
+    avg_score = float(np.average(scores, weights=scored)) if scored.sum() else 0.0
+    active_days = int(np.count_nonzero(attempts))
+    return avg_time, avg_score, active_days
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def load_streak(user_id, version, today):
+    return db.get_streak(user_id)
 
-    st.plotly_chart(fig, use_container_width=True)
+def show_dashboard():
+    st.title("📊 Your AI English Lab Dashboard")
+
+    st.markdown("""
+    ### 🧠 Learning Overview
+    Track your daily progress, assessment scores, and speaking improvements below.
+    """)
+
+    user_id = st.session_state.user["id"]
+    version = db.get_data_version(user_id)
+    today = utc_today()
+    daily = load_daily(user_id, version, today)
+
+    if not daily["attempts"].any():
+        st.info("No practice recorded in the past two weeks yet. Complete a practice session to see your progress here!")
+        return
+
+    data = pd.DataFrame({
+        "Day": daily.index.strftime("%b %d"),
+        "Practice Time (min)": daily["minutes"].to_numpy(),
+        "Average Score": daily["score"].round(1).to_numpy()
+    })
+
+    st.write("#### 🕒 Your Practice Summary (Past 2 Weeks)")
+    st.dataframe(data, use_container_width=True)
+
+    # -----------------------------
+    # 3D Learning Streak Visualization
+    # -----------------------------
+    st.markdown("### 🌟 3D Learning Streak Visualization")
+    st.plotly_chart(build_surface(user_id, version, today), use_container_width=True)
 
     # -----------------------------
     # Summary Metrics
     # -----------------------------
-    avg_time = np.mean(practice_time)
-    avg_score = np.mean(speaking_score)
+    avg_time, avg_score, active_days = summary_metrics(user_id, version, today)
 
     st.markdown("### 📈 Weekly Summary")
     c1, c2, c3 = st.columns(3)
     c1.metric("Average Practice Time", f"{avg_time:.1f} mins/day")
-    c2.metric("Average Speaking Score", f"{avg_score:.1f} / 100")
-    c3.metric("Active Days", f"{len(days)} days")
+    c2.metric("Average Score", f"{avg_score:.1f} / 100")
+    c3.metric("Active Days", f"{active_days} days")
 
     st.markdown("---")
-    st.success("🔥 Keep your streak going! Practice daily to level up your English communication skills.")
+    streak, best = load_streak(user_id, version, today)
+    if streak:
+        st.success(f"🔥 {streak}-day streak (best: {best})! Practice daily to level up your English communication skills.")
+    else:
+        st.success("🔥 Keep your streak going! Practice daily to level up your English communication skills.")
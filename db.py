@@ -1,57 +1,577 @@
+import os
+import sys
+import json
 import sqlite3
-from contextlib import closing
+import threading
+import metrics
 
 DB_PATH = "english_app.db"
 
+# -----------------------------
+# Connection manager
+# -----------------------------
+# Each thread keeps one open connection instead of connecting per
+# statement. Streamlit starts a new script thread for every rerun, so a
+# connection outlives its thread: the next thread that needs one takes
+# over a finished thread's connection, and the number of open connections
+# follows the number of live threads, not the number of reruns. WAL lets
+# readers proceed while a writer commits; the statement cache reuses
+# prepared statements for the fixed SQL strings below.
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",       # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Daily rollup of progress, kept in step with every insert so streaks and
+# daily charts read one row per (day, module) instead of every attempt.
+MINUTES_SQL = (
+    "CASE WHEN json_valid(details) "
+    "THEN COALESCE(json_extract(details, '$.minutes'), 0) ELSE 0 END"
+)
+
+# Averages divide score_sum by `scored`, the attempts that carried a
+# score; `attempts` also counts unscored ones (a speaking conversation).
+BACKFILL_DAILY_SQL = f'''
+    INSERT INTO progress_daily (user_id, day, module, attempts, scored, score_sum, score_min, score_max, minutes)
+    SELECT user_id, date(timestamp), module, COUNT(*), COUNT(score), COALESCE(SUM(score), 0), MIN(score), MAX(score),
+           SUM({MINUTES_SQL})
+    FROM progress
+    {{where}}
+    GROUP BY user_id, date(timestamp), module
+'''
+
+# Schema migrations, applied in order and tracked in PRAGMA user_version.
+MIGRATIONS = [
+    # 1: per-user history lookups, newest first, optionally per module
+    [
+        "CREATE INDEX IF NOT EXISTS idx_progress_user_time ON progress(user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_user_module_time ON progress(user_id, module, timestamp)",
+    ],
+    # 2: per-user data version, bumped with every progress write so
+    #    cached dashboard results know when they are stale
+    [
+        '''CREATE TABLE IF NOT EXISTS user_data_version (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )''',
+    ],
+    # 3: daily rollup of progress, filled from the existing rows
+    [
+        '''CREATE TABLE IF NOT EXISTS progress_daily (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            module TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            scored INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL,
+            score_min REAL,
+            score_max REAL,
+            minutes REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, module)
+        ) WITHOUT ROWID''',
+        "DELETE FROM progress_daily",
+        BACKFILL_DAILY_SQL.format(where=""),
+    ],
+    # 4: shared session state for session_manager's SQLite backend
+    [
+        '''CREATE TABLE IF NOT EXISTS user_sessions (
+            user_id INTEGER NOT NULL PRIMARY KEY,
+            version INTEGER NOT NULL,
+            last_seen REAL NOT NULL,
+            current_page TEXT,
+            head INTEGER NOT NULL DEFAULT 0,
+            minutes BLOB,
+            scores BLOB,
+            days BLOB,
+            weak_areas TEXT,
+            stats TEXT
+        ) WITHOUT ROWID''',
+        "CREATE INDEX IF NOT EXISTS idx_user_sessions_last_seen ON user_sessions(last_seen)",
+    ],
+]
+
+ROLLUP_SQL = '''
+    INSERT INTO progress_daily (user_id, day, module, attempts, scored, score_sum, score_min, score_max, minutes)
+    VALUES (?, date(COALESCE(?, CURRENT_TIMESTAMP)), ?, 1, ? IS NOT NULL, COALESCE(?, 0), ?, ?, ?)
+    ON CONFLICT(user_id, day, module) DO UPDATE SET
+        attempts = attempts + 1,
+        scored = scored + excluded.scored,
+        score_sum = score_sum + excluded.score_sum,
+        score_min = MIN(COALESCE(score_min, excluded.score_min), COALESCE(excluded.score_min, score_min)),
+        score_max = MAX(COALESCE(score_max, excluded.score_max), COALESCE(excluded.score_max, score_max)),
+        minutes = minutes + excluded.minutes
+'''
+
+def practice_minutes(details):
+    if not details:
+        return 0
+    try:
+        return json.loads(details).get("minutes") or 0
+    except (ValueError, AttributeError):
+        return 0
+
+def _rollup_params(user_id, module, score, details, timestamp=None):
+    return (user_id, timestamp, module, score, score, score, score, practice_minutes(details))
+
+BUMP_VERSION_SQL = (
+    "INSERT INTO user_data_version (user_id, version) VALUES (?, 1) "
+    "ON CONFLICT(user_id) DO UPDATE SET version = version + 1"
+)
+
+_local = threading.local()
+_owners = {}                  # thread -> its connection, until another thread takes it
+_owners_lock = threading.Lock()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+def _open(path):
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=10, cached_statements=256)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    """
+    Returns this thread's connection to DB_PATH, opening it on first use
+    (or after DB_PATH changes or the process forks).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_PATH or _local.pid != os.getpid():
+        if conn is not None and _local.pid == os.getpid():
+            close_conn()
+        conn = _adopt() or _open(DB_PATH)
+        _local.conn = conn
+        _local.path = DB_PATH
+        _local.pid = os.getpid()
+        with _owners_lock:
+            _owners[threading.current_thread()] = (conn, DB_PATH, os.getpid())
+    return conn
+
+def _adopt():
+    """Takes over the connection of a thread that has finished, if any."""
+    found = None
+    with _owners_lock:
+        for thread in [t for t in _owners if not t.is_alive()]:
+            conn, path, pid = _owners.pop(thread)
+            if pid != os.getpid():
+                continue  # inherited through fork: the parent still owns it
+            if found is None and path == DB_PATH:
+                found = conn
+            else:
+                conn.close()
+    if found is not None and found.in_transaction:
+        found.rollback()
+    return found
+
+def close_conn():
+    """Closes this thread's connection, if any."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        with _owners_lock:
+            _owners.pop(threading.current_thread(), None)
+        conn.close()
+        _local.conn = None
 
 def init_db():
-    with closing(get_conn()) as conn:
-        c = conn.cursor()
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password TEXT,
-                email TEXT
-            )
-        ''')
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                module TEXT,
-                score REAL,
-                details TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-        conn.commit()
+    """Creates the schema and applies migrations once per process and database file."""
+    if DB_PATH in _schema_ready:
+        return
+    with _schema_lock:
+        if DB_PATH in _schema_ready:
+            return
+        conn = get_conn()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE,
+                    password TEXT,
+                    email TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS progress (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    module TEXT,
+                    score REAL,
+                    details TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(user_id) REFERENCES users(id)
+                )
+            ''')
+        migrate(conn)
+        _schema_ready.add(DB_PATH)
 
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, statements in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        with conn:
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version={number}")
+
+@metrics.instrument("db.add_user")
 def add_user(username, password, email):
-    with closing(get_conn()) as conn:
-        c = conn.cursor()
-        c.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
-                  (username, password, email))
-        conn.commit()
+    conn = get_conn()
+    with conn:
+        conn.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+                     (username, password, email))
 
+@metrics.instrument("db.get_user")
 def get_user(username):
-    with closing(get_conn()) as conn:
-        c = conn.cursor()
-        c.execute("SELECT * FROM users WHERE username=?", (username,))
-        return c.fetchone()
+    conn = get_conn()
+    return conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
 
+@metrics.instrument("db.save_progress")
 def save_progress(user_id, module, score, details):
-    with closing(get_conn()) as conn:
-        c = conn.cursor()
-        c.execute("INSERT INTO progress (user_id, module, score, details) VALUES (?, ?, ?, ?)",
-                  (user_id, module, score, details))
-        conn.commit()
+    conn = get_conn()
+    with conn:
+        conn.execute("INSERT INTO progress (user_id, module, score, details) VALUES (?, ?, ?, ?)",
+                     (user_id, module, score, details))
+        conn.execute(ROLLUP_SQL, _rollup_params(user_id, module, score, details))
+        conn.execute(BUMP_VERSION_SQL, (user_id,))
+
+@metrics.instrument("db.save_progress_many")
+def save_progress_many(rows):
+    """
+    Inserts (user_id, module, score, details, timestamp) rows in one
+    transaction. Used by the write-behind queue in progress_queue.py.
+    """
+    conn = get_conn()
+    with conn:
+        conn.executemany("INSERT INTO progress (user_id, module, score, details, timestamp) VALUES (?, ?, ?, ?, ?)",
+                         rows)
+        conn.executemany(ROLLUP_SQL, [_rollup_params(*row) for row in rows])
+        conn.executemany(BUMP_VERSION_SQL, [(uid,) for uid in {row[0] for row in rows}])
+
+@metrics.instrument("db.get_data_version")
+def get_data_version(user_id):
+    """Changes whenever the user's progress rows change; 0 if none yet."""
+    row = get_conn().execute("SELECT version FROM user_data_version WHERE user_id=?", (user_id,)).fetchone()
+    return row[0] if row else 0
 
+@metrics.instrument("db.get_progress")
 def get_progress(user_id):
-    with closing(get_conn()) as conn:
-        c = conn.cursor()
-        c.execute("SELECT module, score, details, timestamp FROM progress WHERE user_id=?", (user_id,))
-        return c.fetchall()
+    conn = get_conn()
+    return conn.execute("SELECT module, score, details, timestamp FROM progress WHERE user_id=?",
+                        (user_id,)).fetchall()
+
+# -----------------------------
+# History and aggregates
+# -----------------------------
+# These use the (user_id, timestamp) and (user_id, module, timestamp)
+# indexes and return only what the caller shows, never the full history.
+
+@metrics.instrument("db.get_progress_page")
+def get_progress_page(user_id, before=None, limit=20, module=None, with_details=False):
+    """
+    One page of history, newest first. `before` is the cursor returned
+    with the previous page; returns (rows, next_cursor or None).
+    Rows are (id, module, score, timestamp[, details]).
+    """
+    columns = "id, module, score, timestamp" + (", details" if with_details else "")
+    sql = f"SELECT {columns} FROM progress WHERE user_id=?"
+    params = [user_id]
+    if module is not None:
+        sql += " AND module=?"
+        params.append(module)
+    if before is not None:
+        sql += " AND (timestamp, id) < (?, ?)"
+        params.extend(before)
+    sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+
+    rows = get_conn().execute(sql, params).fetchall()
+    next_cursor = (rows[-1][3], rows[-1][0]) if len(rows) == limit else None
+    return rows, next_cursor
+
+@metrics.instrument("db.get_progress_between")
+def get_progress_between(user_id, start, end, module=None):
+    """
+    (module, score, timestamp) rows with start <= timestamp < end, oldest first.
+    start/end are 'YYYY-MM-DD[ HH:MM:SS]' strings (UTC, like CURRENT_TIMESTAMP).
+    """
+    sql = "SELECT module, score, timestamp FROM progress WHERE user_id=?"
+    params = [user_id]
+    if module is not None:
+        sql += " AND module=?"
+        params.append(module)
+    sql += " AND timestamp >= ? AND timestamp < ? ORDER BY timestamp"
+    params.extend([start, end])
+    return get_conn().execute(sql, params).fetchall()
+
+@metrics.instrument("db.get_module_stats")
+def get_module_stats(user_id, since=None):
+    """Per module: (module, attempts, average score, best score, last attempt)."""
+    sql = "SELECT module, COUNT(*), AVG(score), MAX(score), MAX(timestamp) FROM progress WHERE user_id=?"
+    params = [user_id]
+    if since is not None:
+        sql += " AND timestamp >= ?"
+        params.append(since)
+    sql += " GROUP BY module ORDER BY module"
+    return get_conn().execute(sql, params).fetchall()
+
+@metrics.instrument("db.get_score_summary")
+def get_score_summary(user_id, weak_areas=8):
+    """
+    (scored attempts, mean score, sum of squared deviations, latest score,
+    latest active day, [(weak area, count)] most frequent first) over all
+    of the user's progress.
+    """
+    conn = get_conn()
+    count, mean, squares = conn.execute(
+        "SELECT COUNT(score), AVG(score), SUM(score * score) FROM progress WHERE user_id=?", (user_id,)
+    ).fetchone()
+    latest = conn.execute(
+        "SELECT score FROM progress WHERE user_id=? AND score IS NOT NULL ORDER BY timestamp DESC, id DESC LIMIT 1",
+        (user_id,)
+    ).fetchone()
+    last_day = conn.execute("SELECT MAX(day) FROM progress_daily WHERE user_id=?", (user_id,)).fetchone()[0]
+    areas = conn.execute('''
+        SELECT json_extract(details, '$.weak_area') AS area, COUNT(*) FROM progress
+        WHERE user_id=? AND json_valid(details) AND area IS NOT NULL
+        GROUP BY area ORDER BY COUNT(*) DESC LIMIT ?
+    ''', (user_id, weak_areas)).fetchall()
+    m2 = max((squares or 0) - count * (mean or 0) ** 2, 0.0)
+    return count, mean or 0.0, m2, latest[0] if latest else None, last_day, areas
+
+# -----------------------------
+# Bulk export / import
+# -----------------------------
+# Used by progress_export.py. Reads yield fetchmany() chunks from a
+# cursor, so memory stays bounded by chunk_size whatever the table size.
+
+PROGRESS_COLUMNS = ("id", "user_id", "module", "score", "details", "timestamp")
+
+def iter_progress_chunks(start=None, end=None, module=None, user_id=None, chunk_size=5000):
+    """Progress rows (PROGRESS_COLUMNS) in id order, start <= timestamp < end."""
+    sql = f"SELECT {', '.join(PROGRESS_COLUMNS)} FROM progress WHERE 1=1"
+    params = []
+    if user_id is not None:
+        sql += " AND user_id=?"
+        params.append(user_id)
+    if module is not None:
+        sql += " AND module=?"
+        params.append(module)
+    if start is not None:
+        sql += " AND timestamp >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND timestamp < ?"
+        params.append(end)
+    sql += " ORDER BY id"
+    cur = get_conn().execute(sql, params)
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+def iter_user_chunks(include_passwords=False, chunk_size=5000):
+    """(id, username, email[, password]) rows in id order."""
+    columns = "id, username, email" + (", password" if include_passwords else "")
+    cur = get_conn().execute(f"SELECT {columns} FROM users ORDER BY id")
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+@metrics.instrument("db.import_progress_many")
+def import_progress_many(rows):
+    """
+    Inserts exported (id, user_id, module, score, details, timestamp) rows
+    in one transaction, skipping ids that already exist, and rolls up only
+    the rows it inserted, so importing a dump twice changes nothing.
+    A row with id None gets a new id. Returns rows inserted.
+    """
+    conn = get_conn()
+    inserted = []
+    with conn:
+        for row in rows:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO progress (id, user_id, module, score, details, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)", row
+            )
+            if cur.rowcount:
+                inserted.append(row[1:])
+        conn.executemany(ROLLUP_SQL, [_rollup_params(*row) for row in inserted])
+        conn.executemany(BUMP_VERSION_SQL, [(uid,) for uid in {row[0] for row in inserted}])
+    return len(inserted)
+
+@metrics.instrument("db.save_users_many")
+def save_users_many(rows):
+    """
+    Inserts (id, username, email, password) rows in one transaction,
+    skipping ids or usernames that already exist. Returns rows inserted.
+    """
+    conn = get_conn()
+    with conn:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO users (id, username, email, password) VALUES (?, ?, ?, ?)",
+                         rows)
+        return conn.total_changes - before
+
+# -----------------------------
+# Shared session rows
+# -----------------------------
+# Used by session_manager.SQLiteBackend. Every state change bumps
+# `version`, and updates only apply if the version is still the one the
+# writer read (optimistic concurrency); last_seen is not versioned.
+
+SESSION_FIELDS = "last_seen, current_page, head, minutes, scores, days, weak_areas, stats"
+_SESSION_COLUMNS = [name.strip() for name in SESSION_FIELDS.split(",")]
+
+@metrics.instrument("db.load_session")
+def load_session(user_id):
+    """(version, *SESSION_FIELDS) or None."""
+    return get_conn().execute(
+        f"SELECT version, {SESSION_FIELDS} FROM user_sessions WHERE user_id=?", (user_id,)
+    ).fetchone()
+
+@metrics.instrument("db.get_session_version")
+def get_session_version(user_id):
+    row = get_conn().execute("SELECT version FROM user_sessions WHERE user_id=?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+@metrics.instrument("db.save_session")
+def save_session(user_id, expected_version, fields):
+    """
+    Writes a session if its stored version is still expected_version
+    (0 = not stored yet). `fields` follows SESSION_FIELDS. Returns False
+    when another writer got there first.
+    """
+    conn = get_conn()
+    with conn:
+        if expected_version == 0:
+            cur = conn.execute(
+                f"INSERT INTO user_sessions (user_id, version, {SESSION_FIELDS}) "
+                f"VALUES (?, 1, {', '.join('?' * len(_SESSION_COLUMNS))}) ON CONFLICT(user_id) DO NOTHING",
+                (user_id, *fields),
+            )
+        else:
+            cur = conn.execute(
+                f"UPDATE user_sessions SET version=version+1, {', '.join(c + '=?' for c in _SESSION_COLUMNS)} "
+                "WHERE user_id=? AND version=?",
+                (*fields, user_id, expected_version),
+            )
+    return cur.rowcount == 1
+
+@metrics.instrument("db.touch_session")
+def touch_session(user_id, last_seen):
+    conn = get_conn()
+    with conn:
+        conn.execute("UPDATE user_sessions SET last_seen=MAX(last_seen, ?) WHERE user_id=?",
+                     (last_seen, user_id))
+
+@metrics.instrument("db.delete_session")
+def delete_session(user_id):
+    conn = get_conn()
+    with conn:
+        conn.execute("DELETE FROM user_sessions WHERE user_id=?", (user_id,))
+
+@metrics.instrument("db.expire_sessions")
+def expire_sessions(before):
+    """Deletes sessions last seen before `before` (epoch seconds); returns how many."""
+    conn = get_conn()
+    with conn:
+        return conn.execute("DELETE FROM user_sessions WHERE last_seen < ?", (before,)).rowcount
+
+# -----------------------------
+# Daily rollup queries
+# -----------------------------
+# These read progress_daily, so their cost depends on the number of days
+# shown, not on how many attempts the learner has made.
+
+@metrics.instrument("db.get_daily_counts")
+def get_daily_counts(user_id, days=14, module=None):
+    """(day, attempts, average score) for each active day in the last `days` days."""
+    sql = "SELECT day, SUM(attempts), SUM(score_sum) / NULLIF(SUM(scored), 0) FROM progress_daily WHERE user_id=?"
+    params = [user_id]
+    if module is not None:
+        sql += " AND module=?"
+        params.append(module)
+    sql += " AND day >= date('now', ?) GROUP BY day ORDER BY day"
+    params.append(f"-{int(days) - 1} days")
+    return get_conn().execute(sql, params).fetchall()
+
+@metrics.instrument("db.get_daily_practice")
+def get_daily_practice(user_id, days=14):
+    """
+    (day, attempts, scored attempts, average score, practice minutes) per active day in
+    the last `days` days, today included. Minutes come from the
+    "minutes" in the details that session_manager.update_practice records.
+    """
+    return get_conn().execute('''
+        SELECT day, SUM(attempts), SUM(scored), SUM(score_sum) / NULLIF(SUM(scored), 0), SUM(minutes)
+        FROM progress_daily
+        WHERE user_id=? AND day >= date('now', ?)
+        GROUP BY day ORDER BY day
+    ''', (user_id, f"-{int(days) - 1} days")).fetchall()
+
+@metrics.instrument("db.get_streak")
+def get_streak(user_id):
+    """
+    (current streak, best streak) in consecutive active days. The current
+    streak counts back from today, or from yesterday if today has no
+    practice yet.
+    """
+    conn = get_conn()
+    today = conn.execute("SELECT julianday(date('now'))").fetchone()[0]
+    rows = conn.execute(
+        "SELECT DISTINCT julianday(day) FROM progress_daily WHERE user_id=? ORDER BY day DESC",
+        (user_id,)
+    )
+    current = best = run = 0
+    previous = None
+    in_current = True
+    for (day,) in rows:
+        if previous is None:
+            in_current = today - day <= 1
+            run = 1
+        elif previous - day == 1:
+            run += 1
+        else:
+            if in_current:
+                current = run
+            in_current = False
+            best = max(best, run)
+            run = 1
+        previous = day
+    if in_current:
+        current = run
+    best = max(best, run)
+    return current, best
+
+def backfill_daily(user_id=None):
+    """Rebuilds progress_daily from the progress table (all users or one)."""
+    init_db()
+    conn = get_conn()
+    with conn:
+        if user_id is None:
+            conn.execute("DELETE FROM progress_daily")
+            conn.execute(BACKFILL_DAILY_SQL.format(where=""))
+        else:
+            conn.execute("DELETE FROM progress_daily WHERE user_id=?", (user_id,))
+            conn.execute(BACKFILL_DAILY_SQL.format(where="WHERE user_id=?"), (user_id,))
+
+if __name__ == "__main__":
+    # python db.py backfill [user_id]
+    if len(sys.argv) >= 2 and sys.argv[1] == "backfill":
+        backfill_daily(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        print("progress_daily rebuilt.")
+    else:
+        print("usage: python db.py backfill [user_id]")
@@ -1,25 +1,18 @@
+import time
 import streamlit as st
-import tempfile
-import os
-from groq import Groq
-from dotenv import load_dotenv
-
-# -------------------------------
-# Load environment
-# -------------------------------
-load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
-    raise ValueError("❌ GROQ_API_KEY not found in .env")
-
-client = Groq(api_key=groq_api_key)
-
+import ai_logic
+import llm_gateway
+import audio_ingest
+import session_results
+import session_manager
 
 # -------------------------------
 # AI Evaluation
 # -------------------------------
-def analyze_initial_answer(answer_text: str, task_type: str) -> str:
-    prompt = f"""
+ASSESSMENT_SYSTEM = "You are a friendly English teacher giving short, clear feedback."
+
+def build_assessment_prompt(answer_text: str, task_type: str) -> str:
+    return f"""
     You are an English coach. Evaluate this {task_type} response:
 
     "{answer_text}"
@@ -35,34 +28,62 @@ def analyze_initial_answer(answer_text: str, task_type: str) -> str:
     Keep it brief and easy for students to understand.
     """
 
+def analyze_initial_answer(answer_text: str, task_type: str) -> str:
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a friendly English teacher giving short, clear feedback."},
-                {"role": "user", "content": prompt}
-            ],
+        return llm_gateway.ask(
+            build_assessment_prompt(answer_text, task_type),
+            system=ASSESSMENT_SYSTEM,
             max_tokens=350
         )
-        return response.choices[0].message.content
     except Exception as e:
-        return f"⚠️ Error: {str(e)}"
+        return session_results.Failed(f"⚠️ Error: {str(e)}")
+
+def analyze_initial_answer_stream(answer_text: str, task_type: str):
+    """Streams the assessment report for st.write_stream."""
+    try:
+        yield from llm_gateway.ask_stream(
+            build_assessment_prompt(answer_text, task_type),
+            system=ASSESSMENT_SYSTEM,
+            max_tokens=350,
+            label="assessment_report"
+        )
+    except Exception as e:
+        yield session_results.Failed(f"⚠️ Error: {str(e)}")
 
 
 # -------------------------------
 # Audio Transcription
 # -------------------------------
-def transcribe_with_groq(audio_path: str) -> str:
+def transcribe_with_groq(audio_file) -> str:
     try:
-        with open(audio_path, "rb") as f:
-            response = client.audio.transcriptions.create(
-                file=f,
-                model="whisper-large-v3",
-                response_format="text"
-            )
-        return response
+        return llm_gateway.transcribe(audio_file)
     except Exception as e:
-        return f"⚠️ Error in transcription: {str(e)}"
+        return session_results.Failed(f"⚠️ Error in transcription: {str(e)}")
+
+def transcribe_recording(audio) -> str:
+    # Send the recording straight from memory, no temp file.
+    with audio_ingest.measure("assessment") as stats:
+        stats["bytes"] = audio.size
+        return transcribe_with_groq(audio_ingest.from_buffer(audio, "answer.wav"))
+
+def record_report(report: str):
+    """Counts a finished assessment answer as practice, scored from the report."""
+    started = st.session_state.pop("assessment_started", time.time())
+    session_manager.update_practice(
+        st.session_state.user["id"],
+        session_manager.elapsed_minutes(started),
+        ai_logic.score_from_feedback(report),
+        activity="assessment"
+    )
+
+def show_report(answer_text: str, task_type: str):
+    """Streams the report once per answer, then repaints it on reruns."""
+    session_results.stream_once(
+        f"assessment_{task_type}",
+        answer_text,
+        lambda: analyze_initial_answer_stream(answer_text, task_type),
+        on_result=record_report
+    )
 
 
 # -------------------------------
@@ -70,7 +91,12 @@ def transcribe_with_groq(audio_path: str) -> str:
 # -------------------------------
 def run_initial_assessment():
     st.title("📊 English Communication Assessment")
+
+    if not llm_gateway.has_api_key():
+        st.error("❌ GROQ_API_KEY not found in .env")
+        st.stop()
     st.write("Let's quickly assess your English speaking or writing skills.")
+    st.session_state.setdefault("assessment_started", time.time())
 
     task_options = ["📝 Typing Response", "🎤 Voice Response", "📖 Reading Task"]
     task_type = st.radio("Choose your task:", task_options)
@@ -90,8 +116,7 @@ AI and automation bring both new chances and new challenges."""
         answer_text = st.text_area("✍️ Type your response:")
         if answer_text:
             st.subheader("📋 AI Feedback")
-            report = analyze_initial_answer(answer_text, "typing")
-            st.markdown(report)
+            show_report(answer_text, "typing")
 
     # -------------------------------
     # Voice Assessment
@@ -100,19 +125,19 @@ AI and automation bring both new chances and new challenges."""
         st.write(default_task_typing)
         audio = st.audio_input("🎤 Record your voice:")
         if audio:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpfile:
-                tmpfile.write(audio.getbuffer())
-                audio_path = tmpfile.name
-
             st.success("✅ Audio recorded successfully!")
-            answer_text = transcribe_with_groq(audio_path)
+            answer_text = session_results.remember(
+                "assessment_transcript", audio.getbuffer(), lambda: transcribe_recording(audio)
+            )
 
-            st.subheader("📝 Your Words (Transcribed)")
-            st.write(answer_text)
+            if isinstance(answer_text, session_results.Failed):
+                st.error(answer_text)
+            else:
+                st.subheader("📝 Your Words (Transcribed)")
+                st.write(answer_text)
 
-            st.subheader("📋 AI Feedback")
-            report = analyze_initial_answer(answer_text, "voice")
-            st.markdown(report)
+                st.subheader("📋 AI Feedback")
+                show_report(answer_text, "voice")
 
     # -------------------------------
     # Reading Assessment
@@ -121,16 +146,16 @@ AI and automation bring both new chances and new challenges."""
         st.write(default_task_reading)
         audio = st.audio_input("🎤 Read this aloud:")
         if audio:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpfile:
-                tmpfile.write(audio.getbuffer())
-                audio_path = tmpfile.name
-
             st.success("✅ Audio recorded successfully!")
-            answer_text = transcribe_with_groq(audio_path)
+            answer_text = session_results.remember(
+                "assessment_transcript", audio.getbuffer(), lambda: transcribe_recording(audio)
+            )
 
-            st.subheader("📝 Your Reading (Transcribed)")
-            st.write(answer_text)
+            if isinstance(answer_text, session_results.Failed):
+                st.error(answer_text)
+            else:
+                st.subheader("📝 Your Reading (Transcribed)")
+                st.write(answer_text)
 
-            st.subheader("📋 AI Feedback")
-            report = analyze_initial_answer(answer_text, "reading")
-            st.markdown(report)
+                st.subheader("📋 AI Feedback")
+                show_report(answer_text, "reading")
@@ -1,19 +1,12 @@
-import os
 from dotenv import load_dotenv
 from livekit.agents import VoiceAssistant
-from groq import Groq
-from gtts import gTTS
-import tempfile
+import llm_gateway
+import tts
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
 def text_to_speech(text):
-    tts = gTTS(text=text, lang="en")
-    f = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    tts.save(f.name)
-    return f.name
+    return tts.speak_text(text)
 
 async def ai_response(transcript: str) -> str:
     prompt = f"""
@@ -22,12 +15,7 @@ async def ai_response(transcript: str) -> str:
 
     "{transcript}"
     """
-    res = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=150
-    )
-    return res.choices[0].message.content.strip()
+    return llm_gateway.ask(prompt, max_tokens=150)
 
 assistant = VoiceAssistant(
     on_user_speech=ai_response,
@@ -1,15 +1,156 @@
-from fastapi import FastAPI, UploadFile
-from livekit import AccessToken, VideoGrant
-import os, tempfile
-from groq import Groq
-from ai_logic import analyze_answer
-from tts import text_to_speech
+from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import base64
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+import llm_gateway
+import audio_ingest
+from ai_logic import analyze_answer, analyze_answer_stream
+import tts
+import metrics
 
 app = FastAPI()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+# -------------------------------
+# Concurrency limits
+# -------------------------------
+# Groq, Whisper and gTTS calls are blocking, so they run on a dedicated
+# thread pool and never on the event loop. At most MAX_CONCURRENCY
+# requests are processed at once, MAX_QUEUE more may wait for a slot,
+# and anything beyond that is turned away with 429.
+MAX_CONCURRENCY = int(os.getenv("BACKEND_MAX_CONCURRENCY", 8))
+MAX_QUEUE = int(os.getenv("BACKEND_MAX_QUEUE", 32))
+REQUEST_TIMEOUT = float(os.getenv("BACKEND_REQUEST_TIMEOUT", 60))
+
+executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="process-audio")
+# Sentence TTS gets its own pool so it never waits behind token streams.
+tts_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY * 2, thread_name_prefix="sentence-tts")
+slots = asyncio.Semaphore(MAX_CONCURRENCY)
+pending = 0
+
+def admit():
+    """Reserves a place in the queue or rejects the request with 429."""
+    global pending
+    if pending >= MAX_CONCURRENCY + MAX_QUEUE:
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    pending += 1
+
+def release():
+    global pending
+    pending -= 1
+
+class Admission:
+    """
+    One request's place in the queue and, once acquired, its slot. Both
+    are given back when the request is closed and every executor job it
+    started has returned: a job that timed out or lost its client keeps
+    running on its thread, so it keeps its slot until it is done.
+    REQUEST_TIMEOUT runs from admission and covers the wait for a slot.
+    """
+
+    def __init__(self):
+        admit()
+        self.deadline = time.perf_counter() + REQUEST_TIMEOUT
+        self.has_slot = False
+        self.jobs = 0
+        self.closed = False
+
+    def time_left(self):
+        return max(self.deadline - time.perf_counter(), 0.0)
+
+    async def acquire(self):
+        """Waits for a slot; raises asyncio.TimeoutError past the deadline."""
+        await asyncio.wait_for(slots.acquire(), self.time_left())
+        self.has_slot = True
+
+    def run(self, fn, *args, pool=executor):
+        """Starts fn on the pool; await the result through asyncio.shield."""
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(pool, in_context(fn), *args)
+        self.jobs += 1
+        job.add_done_callback(self._job_done)
+        return job
+
+    def _job_done(self, job):
+        self.jobs -= 1
+        self._give_back()
+
+    def close(self):
+        """Ends the request; safe to call more than once."""
+        if not self.closed:
+            self.closed = True
+            self._give_back()
+
+    def _give_back(self):
+        if not self.closed or self.jobs:
+            return
+        if self.has_slot:
+            self.has_slot = False
+            slots.release()
+        release()
+
+# Executor jobs run in a copy of the caller's context (as asyncio.to_thread
+# does), so metrics recorded on the pool keep the request's page label.
+def in_context(fn):
+    return functools.partial(contextvars.copy_context().run, fn)
+
+async def iter_blocking(admission, gen_fn, *args):
+    """
+    Runs a blocking generator on the executor and yields its items
+    on the event loop as they are produced. When this generator is
+    closed early, the pump stops at the next item and closes gen_fn's
+    generator, so an abandoned stream does not run on to the end. Waiting
+    for an item raises asyncio.TimeoutError past the admission's deadline.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+    stop = threading.Event()
+
+    def pump():
+        items = gen_fn(*args)
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    worker = admission.run(pump)
+    try:
+        while True:
+            item = await asyncio.wait_for(queue.get(), admission.time_left())
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await asyncio.shield(worker)
+    finally:
+        stop.set()
 
 @app.get("/token")
 def get_token():
+    # Imported here so the audio endpoints run without the LiveKit SDK.
+    from livekit import AccessToken, VideoGrant
+
     token = (
         AccessToken(
             os.getenv("LIVEKIT_API_KEY"),
@@ -27,29 +168,161 @@ def get_token():
     )
     return token.to_jwt()
 
-@app.post("/process_audio")
-async def process_audio(file: UploadFile):
-    # Save audio
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-        f.write(await file.read())
-        audio_path = f.name
-
+def process_upload(upload):
+    """Blocking pipeline for one recording; runs on the executor."""
     # Speech → Text
-    with open(audio_path, "rb") as audio:
-        transcript = client.audio.transcriptions.create(
-            file=audio,
-            model="whisper-large-v3",
-            response_format="text"
-        )
+    with upload[1]:
+        transcript = llm_gateway.transcribe(upload)
 
     # AI analysis
     feedback_text = analyze_answer(transcript)
 
-    # Text → Speech
-    voice_path = text_to_speech(feedback_text)
+    # Text → Speech (cached by content, fetched from /tts/<key>)
+    tts.synthesize(feedback_text)
+    voice_key = tts.cache_key(feedback_text)
 
     return {
         "transcript": transcript,
         "feedback": feedback_text,
-        "voice_file": voice_path
+        "voice_url": f"/tts/{voice_key}"
     }
+
+@app.post("/process_audio")
+async def process_audio(file: UploadFile):
+    admission = Admission()
+    metrics.current_page.set("process_audio")
+    try:
+        await admission.acquire()
+        with audio_ingest.measure("process_audio") as stats:
+            # Read audio (in memory, spooled to disk only when large)
+            upload = await audio_ingest.from_upload(file, stats)
+            job = admission.run(process_upload, upload)
+            # shield: a timeout stops the wait, not the job (or its slot)
+            return await asyncio.wait_for(asyncio.shield(job), admission.time_left())
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Processing timed out")
+    finally:
+        admission.close()
+
+# -------------------------------
+# Streamed variant (NDJSON)
+# -------------------------------
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def transcribe_upload(upload):
+    with upload[1]:
+        return llm_gateway.transcribe(upload)
+
+def sentence_audio(sentence, inline):
+    audio = tts.synthesize(sentence)
+    if inline:
+        return {"audio_b64": base64.b64encode(audio).decode("ascii")}
+    return {"audio_url": f"/tts/{tts.cache_key(sentence)}"}
+
+async def pipeline_events(upload, inline, admission, read_stats):
+    """
+    Transcript first, then feedback tokens, with each finished sentence
+    sent to TTS while the model is still generating the next one.
+    """
+    metrics.current_page.set("process_audio_stream")
+    start = time.perf_counter()
+    audio_jobs = []  # (index, sentence, future), in speaking order
+    sent_audio = 0
+
+    def event(kind, **fields):
+        fields["type"] = kind
+        fields["t"] = round(time.perf_counter() - start, 3)
+        return json.dumps(fields) + "\n"
+
+    def speak(sentence):
+        future = admission.run(sentence_audio, sentence, inline, pool=tts_executor)
+        audio_jobs.append((len(audio_jobs), sentence, future))
+
+    async def ready_audio(wait=False):
+        nonlocal sent_audio
+        while sent_audio < len(audio_jobs):
+            index, sentence, future = audio_jobs[sent_audio]
+            if not future.done() and not wait:
+                return
+            payload = await asyncio.wait_for(asyncio.shield(future), admission.time_left())
+            sent_audio += 1
+            yield event("audio", index=index, text=sentence, **payload)
+
+    try:
+        with audio_ingest.measure("process_audio_stream") as stats:
+            stats.update(read_stats)
+            job = admission.run(transcribe_upload, upload)
+            transcript = await asyncio.wait_for(asyncio.shield(job), admission.time_left())
+            yield event("transcript", text=transcript)
+
+            buffer = ""
+            parts = []
+            async for token in iter_blocking(admission, analyze_answer_stream, transcript):
+                parts.append(token)
+                yield event("token", text=token)
+                buffer += token
+                sentences = SENTENCE_END.split(buffer)
+                buffer = sentences.pop()
+                for sentence in sentences:
+                    if sentence.strip():
+                        speak(sentence.strip())
+                async for line in ready_audio():
+                    yield line
+                if not admission.time_left():
+                    raise asyncio.TimeoutError
+
+            if buffer.strip():
+                speak(buffer.strip())
+            async for line in ready_audio(wait=True):
+                yield line
+            yield event("done", feedback="".join(parts).strip())
+    except asyncio.TimeoutError:
+        yield event("error", detail="Processing timed out")
+    except Exception as e:
+        yield event("error", detail=str(e))
+    finally:
+        admission.close()
+
+@app.post("/process_audio/stream")
+async def process_audio_stream(file: UploadFile, inline_audio: bool = False):
+    """
+    Streams NDJSON events: "transcript", then "token" pieces of the
+    feedback and an "audio" event per spoken sentence (a fetchable
+    /tts/<key> URL, or base64 MP3 with ?inline_audio=true), then "done".
+    """
+    admission = Admission()
+    read_stats = {}
+    try:
+        # Wait for a slot before answering: once the 200 has gone out, a
+        # timeout can only be reported as an "error" event.
+        await admission.acquire()
+        # Read the upload now: it is closed once this handler returns.
+        upload = await audio_ingest.from_upload(file, read_stats)
+    except asyncio.TimeoutError:
+        admission.close()
+        raise HTTPException(status_code=504, detail="Processing timed out")
+    except BaseException:
+        admission.close()
+        raise
+    # The generator's finally never runs if the client leaves before the
+    # body starts, so the response also closes the admission when done.
+    return StreamingResponse(
+        pipeline_events(upload, inline_audio, admission, read_stats),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(admission.close)
+    )
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/tts/{key}")
+def get_tts_audio(key: str):
+    audio = tts.load_cached(key)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return Response(
+        content=audio,
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
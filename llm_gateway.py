@@ -0,0 +1,429 @@
+import os
+import json
+import time
+import sqlite3
+import random
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+import metrics
+import audio_ingest
+
+# -------------------------------
+# Settings
+# -------------------------------
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+WHISPER_MODEL = "whisper-large-v3"
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.db"))
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+
+_client = None
+_client_lock = threading.Lock()
+
+# Recent streaming calls: time-to-first-token and total time per call.
+STREAM_METRICS = deque(maxlen=500)
+
+
+# -------------------------------
+# Shared Groq client
+# -------------------------------
+def has_api_key() -> bool:
+    return bool(os.getenv("GROQ_API_KEY"))
+
+def get_client():
+    """
+    Returns the process-wide Groq client.
+    One pooled keep-alive HTTP client is shared by every page. groq and
+    httpx are imported here, on first use, to keep them off the import
+    path of pages that never call the API.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv("GROQ_API_KEY")
+                if not api_key:
+                    raise RuntimeError("GROQ_API_KEY not found. Please set it in .env file.")
+                import httpx
+                from groq import Groq
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=20,
+                        max_keepalive_connections=10,
+                        keepalive_expiry=60,
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=5.0),
+                )
+                _client = Groq(api_key=api_key, http_client=http_client)
+    return _client
+
+
+# -------------------------------
+# Response cache (SQLite)
+# -------------------------------
+class ResponseCache:
+    """
+    Persistent completion cache with TTL expiry and LRU eviction
+    once the stored text exceeds `max_bytes`.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _get_conn(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    size INTEGER,
+                    created REAL,
+                    last_used REAL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT value, created FROM responses WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl and now - created > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key=?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET last_used=? WHERE key=?", (now, key))
+            conn.commit()
+            return value
+
+    def put(self, key, value):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM responses WHERE key=?", victims)
+
+    def clear(self):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+
+response_cache = ResponseCache()
+
+
+# -------------------------------
+# Single-flight coalescing
+# -------------------------------
+class FlightAbandoned(Exception):
+    """The leading call stopped early (a stream nobody finished reading)."""
+
+
+class SingleFlight:
+    """
+    Concurrent callers with the same key share one in-flight call instead
+    of each sending their own. With variety > 1, up to `variety` calls per
+    key run side by side and later callers join one of them at random, so
+    a class clicking the same button at once still sees a mix. Nothing is
+    kept once a call finishes: the next caller makes a new one.
+
+    Every caller is counted in app_coalesce_total{result=leader|joined};
+    joined / all is the coalescing ratio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}   # key -> [Future]
+
+    def claim(self, key, variety=1):
+        """
+        Returns ("leader", future) or ("joined", future). A leader makes
+        the call and must pass its outcome to finish().
+        """
+        with self._lock:
+            futures = self._inflight.setdefault(key, [])
+            if len(futures) < variety:
+                role, future = "leader", Future()
+                futures.append(future)
+            else:
+                role, future = "joined", random.choice(futures)
+        return role, future
+
+    def finish(self, key, future, value=None, error=None):
+        with self._lock:
+            futures = self._inflight[key]
+            futures.remove(future)
+            if not futures:
+                del self._inflight[key]
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def wait(self, key, op, variety=1, call=None):
+        """
+        Joins an identical call in flight and returns (True, its result),
+        or returns (False, future) when this caller has to lead. A joined
+        caller is tagged "coalesced" in its metrics `call` dict, so the
+        wait is not recorded as a call of its own.
+        """
+        while True:
+            role, future = self.claim(key, variety)
+            if role == "leader":
+                if call is not None:
+                    call.pop("coalesced", None)
+                self._count(op, role)
+                return False, future
+            if call is not None:
+                call["coalesced"] = True
+            try:
+                value = future.result()
+            except FlightAbandoned:
+                continue  # the leader gave up; claim again, maybe as leader
+            except BaseException:
+                self._count(op, role)
+                raise
+            self._count(op, role)
+            return True, value
+
+    def _count(self, op, role):
+        metrics.inc("app_coalesce_total", op=op, page=metrics.current_page.get(), result=role)
+
+    def do(self, key, fn, op, variety=1, call=None):
+        """Runs fn() once per in-flight key and returns its result to every caller."""
+        joined, result = self.wait(key, op, variety, call)
+        if joined:
+            return result
+        try:
+            value = fn()
+        except BaseException as e:
+            self.finish(key, result, error=e)
+            raise
+        self.finish(key, result, value)
+        return value
+
+
+flights = SingleFlight()
+
+
+def make_key(model, messages, **params) -> str:
+    """Cache key for a completion: model, messages and sampling parameters."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -------------------------------
+# Public API
+# -------------------------------
+def chat(messages, model=DEFAULT_MODEL, max_tokens=300, temperature=None, cache=True, variety=1) -> str:
+    """
+    Runs a chat completion and returns the stripped reply text.
+    Identical requests are answered from the response cache.
+    Pass cache=False where a fresh sample is wanted every call. Identical
+    calls already in flight are shared (see SingleFlight); variety > 1
+    lets that many identical requests run at once, for different replies.
+    """
+    params = {"max_tokens": max_tokens}
+    if temperature is not None:
+        params["temperature"] = temperature
+
+    key = make_key(model, messages, **params)
+    with metrics.timed("llm.chat") as call:
+        if cache:
+            hit = response_cache.get(key)
+            call["cache"] = "miss" if hit is None else "hit"
+            if hit is not None:
+                return hit
+
+        def complete():
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                **params
+            )
+            text = response.choices[0].message.content.strip()
+            _count_tokens(call, getattr(response, "usage", None))
+            if cache:
+                response_cache.put(key, text)
+            return text
+
+        return flights.do(key, complete, "llm.chat", variety, call)
+
+
+def ask(prompt, system=None, **kwargs) -> str:
+    """Shortcut for a single user prompt with an optional system message."""
+    return chat(_messages(prompt, system), **kwargs)
+
+
+def peek(prompt, system=None, model=DEFAULT_MODEL, max_tokens=300, temperature=None):
+    """Returns the cached reply for an ask() call, or None, without calling the API."""
+    params = {"max_tokens": max_tokens}
+    if temperature is not None:
+        params["temperature"] = temperature
+    return response_cache.get(make_key(model, _messages(prompt, system), **params))
+
+
+def stream_chat(messages, model=DEFAULT_MODEL, max_tokens=300, temperature=None, cache=True, label="chat"):
+    """
+    Streaming variant of chat(): yields text pieces as they arrive.
+    A cache hit, or the reply of an identical stream already in flight,
+    is yielded as one piece. The complete reply is cached only when the
+    stream is consumed to the end.
+    """
+    params = {"max_tokens": max_tokens}
+    if temperature is not None:
+        params["temperature"] = temperature
+
+    start = time.perf_counter()
+    first_token = None
+    key = make_key(model, messages, **params)
+    with metrics.timed("llm.stream") as call:
+        if cache:
+            hit = response_cache.get(key)
+            call["cache"] = "miss" if hit is None else "hit"
+            if hit is not None:
+                _record_stream(label, model, start, time.perf_counter(), cached=True)
+                yield hit
+                return
+
+        # Someone is already streaming this exact request: wait for their
+        # reply and send it in one piece.
+        joined, flight = flights.wait(key, "llm.stream", call=call)
+        if joined:
+            _record_stream(label, model, start, time.perf_counter(), cached=True)
+            yield flight
+            return
+
+        parts = []
+        try:
+            stream = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                **params
+            )
+            for chunk in stream:
+                # Groq reports usage on the last chunk, under x_groq.
+                _count_tokens(call, getattr(getattr(chunk, "x_groq", None), "usage", None))
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if not piece:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter()
+                    call["ttft"] = first_token - start
+                parts.append(piece)
+                yield piece
+        except BaseException as e:
+            flights.finish(key, flight, error=FlightAbandoned() if isinstance(e, GeneratorExit) else e)
+            raise
+
+    _record_stream(label, model, start, first_token, cached=False)
+    text = "".join(parts).strip()
+    flights.finish(key, flight, text)
+    if cache:
+        response_cache.put(key, text)
+
+
+def ask_stream(prompt, system=None, **kwargs):
+    """Streaming shortcut for a single user prompt."""
+    return stream_chat(_messages(prompt, system), **kwargs)
+
+
+def _messages(prompt, system=None):
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _count_tokens(call, usage):
+    if usage is not None:
+        call["tokens_in"] = getattr(usage, "prompt_tokens", 0) or 0
+        call["tokens_out"] = getattr(usage, "completion_tokens", 0) or 0
+
+
+def _record_stream(label, model, start, first_token, cached):
+    end = time.perf_counter()
+    STREAM_METRICS.append({
+        "label": label,
+        "model": model,
+        "ttft": (first_token or end) - start,
+        "total": end - start,
+        "cached": cached,
+        "at": time.time(),
+    })
+
+
+def get_stream_metrics(label=None):
+    """Returns recorded streaming timings, optionally for one label."""
+    return [m for m in STREAM_METRICS if label is None or m["label"] == label]
+
+
+def transcribe(file, model=WHISPER_MODEL) -> str:
+    """Transcribes an audio file object with Whisper and returns plain text."""
+    with metrics.timed("whisper") as call:
+        try:
+            call["bytes"], call["audio_seconds"] = audio_ingest.describe(file)
+        except Exception:
+            pass  # size and duration are only metrics; never fail the call
+        response = get_client().audio.transcriptions.create(
+            file=file,
+            model=model,
+            response_format="text"
+        )
+    return response.strip()
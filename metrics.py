@@ -0,0 +1,232 @@
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# ------------------------------------
+# Process-wide call instrumentation
+# ------------------------------------
+# Every outbound call (Groq chat, Whisper, gTTS, PDF parsing) and every
+# db.py operation runs inside timed(op), which records into one
+# in-process registry:
+#
+#   app_call_duration_seconds  histogram  {op, page}
+#   app_call_errors_total      counter    {op, page}   calls that raised
+#   app_cache_total            counter    {op, page, result=hit|miss}
+#   app_tokens_total           counter    {op, page, direction=in|out}
+#   app_audio_seconds_total    counter    {op, page}
+#   app_call_bytes             histogram  {op, page}
+#   app_llm_ttft_seconds       histogram  {op, page}   streamed replies
+#   app_coalesced_wait_seconds histogram  {op, page}   callers that joined an
+#                                                      identical call in flight
+#
+# `page` comes from page_context(), which app.py sets around each page
+# run, so the numbers split by page and by stage. render() returns the
+# Prometheus text format served on /metrics.
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+current_page = contextvars.ContextVar("current_page", default="")
+# page_profiler sets a dict here for the length of one page run; timed()
+# adds each call's duration to it under the call's op, or "cache.<op>"
+# for a cache hit, which is served locally.
+call_totals = contextvars.ContextVar("call_totals", default=None)
+_totals_lock = threading.Lock()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate from the buckets (linear within a bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}    # (name, labels) -> Histogram
+        self._counters = {}      # (name, labels) -> float
+
+    def observe(self, name, value, labels, buckets=DURATION_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self):
+        """(histograms, counters) copies, safe to read while calls continue."""
+        with self._lock:
+            histograms = {}
+            for key, hist in self._histograms.items():
+                copy = Histogram(hist.buckets)
+                copy.counts, copy.sum, copy.count = list(hist.counts), hist.sum, hist.count
+                histograms[key] = copy
+            return histograms, dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        histograms, counters = self.snapshot()
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (hname, labels), hist in sorted(histograms.items()):
+                if hname != name:
+                    continue
+                cumulative = 0
+                for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(hist.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (cname, labels), value in sorted(counters.items()):
+                if cname == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+registry = Registry()
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    registry.observe(name, value, labels, buckets)
+
+def inc(name, amount=1, **labels):
+    registry.inc(name, labels, amount)
+
+def render() -> str:
+    return registry.render()
+
+# ------------------------------------
+# Call timing
+# ------------------------------------
+@contextmanager
+def page_context(page: str):
+    """Labels every call made inside the block with `page`."""
+    token = current_page.set(page)
+    try:
+        yield
+    finally:
+        current_page.reset(token)
+
+@contextmanager
+def timed(op: str):
+    """
+    Times the block as one call of `op`. The yielded dict takes optional
+    details: cache ("hit"/"miss"), tokens_in, tokens_out, audio_seconds,
+    bytes, ttft (seconds to first streamed token), and coalesced (True
+    when the caller only waited on someone else's identical call: the wait
+    is recorded apart from real calls, with no cache result or error).
+    """
+    labels = {"op": op, "page": current_page.get()}
+    call = {}
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit) and not call.get("coalesced"):
+            registry.inc("app_call_errors_total", labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        totals = call_totals.get()
+        if totals is not None:
+            key = f"cache.{op}" if call.get("cache") == "hit" else op
+            with _totals_lock:
+                totals[key] = totals.get(key, 0.0) + elapsed
+        if call.get("coalesced"):
+            registry.observe("app_coalesced_wait_seconds", elapsed, labels)
+        else:
+            _record_call(labels, elapsed, call)
+
+def _record_call(labels, elapsed, call):
+    registry.observe("app_call_duration_seconds", elapsed, labels)
+    if "cache" in call:
+        registry.inc("app_cache_total", {**labels, "result": call["cache"]})
+    if call.get("tokens_in"):
+        registry.inc("app_tokens_total", {**labels, "direction": "in"}, call["tokens_in"])
+    if call.get("tokens_out"):
+        registry.inc("app_tokens_total", {**labels, "direction": "out"}, call["tokens_out"])
+    if call.get("audio_seconds"):
+        registry.inc("app_audio_seconds_total", labels, call["audio_seconds"])
+    if call.get("bytes") is not None:
+        registry.observe("app_call_bytes", call["bytes"], labels, BYTES_BUCKETS)
+    if call.get("ttft") is not None:
+        registry.observe("app_llm_ttft_seconds", call["ttft"], labels)
+
+def instrument(op: str):
+    """Decorator form of timed(op) for plain functions."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(op):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def bind_page(fn):
+    """
+    Wraps fn so it runs with the caller's page label and run totals
+    (for thread pools).
+    """
+    page = current_page.get()
+    totals = call_totals.get()
+
+    def run(*args, **kwargs):
+        token = call_totals.set(totals)
+        try:
+            with page_context(page):
+                return fn(*args, **kwargs)
+        finally:
+            call_totals.reset(token)
+    return run
@@ -0,0 +1,210 @@
+import os
+import time
+import heapq
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+import metrics
+
+# ------------------------------------
+# Per-page render profiling (opt-in)
+# ------------------------------------
+# With PAGE_PROFILE set, app.py runs every page inside profile(page), which
+# records for each script run:
+#   wall      time from dispatch to the end of the page function
+#   network   time spent in Groq / Whisper / gTTS calls (from metrics.timed;
+#             calls made in parallel, e.g. book summaries, are summed;
+#             response-cache hits are local reads and count as local time)
+#   db        time spent in db.py queries
+#   cpu       CPU time of the script thread
+# plus rerun counts per page and per browser session. A page whose wall
+# time stays high on widget clicks while network stays near zero is
+# redoing local work on every rerun.
+#
+#   PAGE_PROFILE=1             timings only
+#   PAGE_PROFILE=cprofile      timings, and a .prof file for the slowest runs
+#   PAGE_PROFILE=pyinstrument  timings, and an .html report for the slowest runs
+#
+# Only the PAGE_PROFILE_TOP slowest runs keep a capture file (in
+# PAGE_PROFILE_DIR); a faster capture is deleted when a slower run arrives.
+
+PROFILE_MODE = os.getenv("PAGE_PROFILE", "").strip().lower()
+PROFILE_DIR = os.getenv("PAGE_PROFILE_DIR", os.path.join(".cache", "profiles"))
+PROFILE_TOP = int(os.getenv("PAGE_PROFILE_TOP", 5))
+MAX_SESSIONS = 1000
+
+NETWORK_OPS = ("llm.", "whisper", "tts")
+
+ENABLED = PROFILE_MODE not in ("", "0", "off")
+CAPTURE = PROFILE_MODE if PROFILE_MODE in ("cprofile", "pyinstrument") else None
+
+_lock = threading.Lock()
+_pages = {}                  # page -> totals dict
+_sessions = OrderedDict()    # session id -> {page: reruns}, least recently seen first
+_slowest = []                # min-heap of (wall, path)
+
+
+def _pyinstrument():
+    try:
+        import pyinstrument
+    except ImportError:
+        raise RuntimeError("PAGE_PROFILE=pyinstrument needs pyinstrument: pip install pyinstrument") from None
+    return pyinstrument
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return ""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else ""
+
+# ------------------------------------
+# Capture of the slowest runs
+# ------------------------------------
+class _Capture:
+    """One cProfile or pyinstrument profiler around a single run."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.profiler = None
+
+    def start(self):
+        try:
+            if self.mode == "cprofile":
+                import cProfile
+                self.profiler = cProfile.Profile()
+                self.profiler.enable()
+            else:
+                self.profiler = _pyinstrument().Profiler()
+                self.profiler.start()
+        except ValueError:
+            # Another profiler is already active (cProfile is process-wide
+            # on Python 3.12+); this run is timed but not captured.
+            self.profiler = None
+
+    def stop(self):
+        if self.profiler is None:
+            return
+        if self.mode == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def save(self, path):
+        if self.mode == "cprofile":
+            self.profiler.dump_stats(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.profiler.output_html())
+
+def _keep_if_slow(page, wall, capture):
+    """Saves the capture when the run is among the PROFILE_TOP slowest."""
+    if capture.profiler is None or PROFILE_TOP <= 0:
+        return
+    with _lock:
+        if len(_slowest) >= PROFILE_TOP and wall <= _slowest[0][0]:
+            return
+        ext = ".prof" if capture.mode == "cprofile" else ".html"
+        path = os.path.join(PROFILE_DIR, f"{page}-{wall * 1000:.0f}ms-{time.time_ns()}{ext}")
+        if len(_slowest) < PROFILE_TOP:
+            heapq.heappush(_slowest, (wall, path))
+            evicted = None
+        else:
+            evicted = heapq.heapreplace(_slowest, (wall, path))
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    capture.save(path)
+    if evicted is not None:
+        try:
+            os.remove(evicted[1])
+        except FileNotFoundError:
+            pass
+
+# ------------------------------------
+# Recording
+# ------------------------------------
+def _record(page, session, wall, cpu, calls):
+    network = sum(t for op, t in calls.items() if op.startswith(NETWORK_OPS))
+    db_time = sum(t for op, t in calls.items() if op.startswith("db."))
+
+    metrics.observe("app_page_run_seconds", wall, page=page)
+    metrics.inc("app_page_network_seconds_total", network, page=page)
+    metrics.inc("app_page_cpu_seconds_total", cpu, page=page)
+
+    with _lock:
+        totals = _pages.setdefault(page, {
+            "runs": 0, "wall": 0.0, "wall_max": 0.0, "network": 0.0, "db": 0.0, "cpu": 0.0,
+        })
+        totals["runs"] += 1
+        totals["wall"] += wall
+        totals["wall_max"] = max(totals["wall_max"], wall)
+        totals["network"] += network
+        totals["db"] += db_time
+        totals["cpu"] += cpu
+
+        counts = _sessions.pop(session, None) or {}
+        counts[page] = counts.get(page, 0) + 1
+        _sessions[session] = counts
+        if len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+
+@contextmanager
+def _profiled(page):
+    calls = {}
+    token = metrics.call_totals.set(calls)
+    capture = _Capture(CAPTURE) if CAPTURE else None
+    if capture:
+        capture.start()
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - start, time.thread_time() - cpu_start
+        if capture:
+            capture.stop()
+        metrics.call_totals.reset(token)
+        _record(page, _session_id(), wall, cpu, calls)
+        if capture:
+            _keep_if_slow(page, wall, capture)
+
+def profile(page: str):
+    """Context manager around one page run; does nothing unless PAGE_PROFILE is set."""
+    return _profiled(page) if ENABLED else nullcontext()
+
+# ------------------------------------
+# Reports
+# ------------------------------------
+def page_report():
+    """One dict per page: runs and mean wall / network / db / cpu in ms."""
+    with _lock:
+        pages = {page: dict(totals) for page, totals in _pages.items()}
+    rows = []
+    for page, t in sorted(pages.items()):
+        runs = t["runs"]
+        rows.append({
+            "page": page,
+            "runs": runs,
+            "wall ms": t["wall"] / runs * 1000,
+            "max ms": t["wall_max"] * 1000,
+            "network ms": t["network"] / runs * 1000,
+            "db ms": t["db"] / runs * 1000,
+            "cpu ms": t["cpu"] / runs * 1000,
+            "local ms": max(t["wall"] - t["network"] - t["db"], 0.0) / runs * 1000,
+        })
+    return rows
+
+def session_report():
+    """{session id: {page: reruns}}, most recently active first."""
+    with _lock:
+        return {session: dict(counts) for session, counts in reversed(_sessions.items())}
+
+def slowest_captures():
+    """(wall seconds, path) of the kept capture files, slowest first."""
+    with _lock:
+        return sorted(_slowest, reverse=True)
+
+def reset():
+    with _lock:
+        _pages.clear()
+        _sessions.clear()
+        _slowest.clear()
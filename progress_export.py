@@ -0,0 +1,191 @@
+import os
+import csv
+import json
+import argparse
+from itertools import islice
+import db
+from progress_queue import utc_timestamp
+
+# ------------------------------------
+# Streaming export / import of progress
+# ------------------------------------
+# Rows move between SQLite and files one chunk at a time: exports read
+# fetchmany() chunks from db.iter_*_chunks, imports insert each batch in
+# one transaction (progress through db.import_progress_many, so the daily
+# rollup and data versions stay in step). Progress rows keep their
+# exported ids and ids already present are skipped, so re-importing a
+# dump adds nothing; --new-ids appends every row under a new id instead
+# (e.g. merging another database's dump). Formats: CSV, JSON Lines and,
+# when pyarrow is installed, Parquet.
+#
+#   python progress_export.py export progress dump.csv --start 2026-01-01 --module speaking
+#   python progress_export.py import progress dump.csv
+
+CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 5000))
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+USER_COLUMNS = ("id", "username", "email")
+
+
+def detect_format(path: str, fmt: str | None = None) -> str:
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Can't tell the format of {path!r}; use one of {sorted(FORMATS)} or pass fmt.")
+    return FORMATS[ext]
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet support needs pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+def _schema(pa, columns):
+    types = {"id": pa.int64(), "user_id": pa.int64(), "score": pa.float64()}
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns])
+
+# ------------------------------------
+# Export
+# ------------------------------------
+def _source(table, start, end, module, user_id, include_passwords, chunk_size):
+    if table == "progress":
+        return db.PROGRESS_COLUMNS, db.iter_progress_chunks(start, end, module, user_id, chunk_size)
+    if table == "users":
+        columns = USER_COLUMNS + (("password",) if include_passwords else ())
+        return columns, db.iter_user_chunks(include_passwords, chunk_size)
+    raise ValueError(f"Unknown table {table!r}; use 'progress' or 'users'.")
+
+def export_table(table, path, fmt=None, start=None, end=None, module=None, user_id=None,
+                 include_passwords=False, chunk_size=CHUNK_ROWS) -> int:
+    """
+    Streams a table to a file and returns the number of rows written.
+    Progress rows can be filtered by start <= timestamp < end
+    ('YYYY-MM-DD[ HH:MM:SS]', UTC), module and user. Password hashes are
+    left out of user exports unless include_passwords is set.
+    """
+    fmt = detect_format(path, fmt)
+    db.init_db()
+    columns, chunks = _source(table, start, end, module, user_id, include_passwords, chunk_size)
+    count = 0
+
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rows in chunks:
+                writer.writerows(rows)
+                count += len(rows)
+    elif fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for rows in chunks:
+                f.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+                count += len(rows)
+    elif fmt == "parquet":
+        pa = _pyarrow()
+        schema = _schema(pa, columns)
+        with pa.parquet.ParquetWriter(path, schema) as writer:
+            for rows in chunks:
+                arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                count += len(rows)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}.")
+    return count
+
+# ------------------------------------
+# Import
+# ------------------------------------
+def _read_records(path, fmt, chunk_size):
+    """Yields lists of dicts, at most chunk_size each."""
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            while batch := list(islice(reader, chunk_size)):
+                yield batch
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            lines = (json.loads(line) for line in f if line.strip())
+            while batch := list(islice(lines, chunk_size)):
+                yield batch
+    elif fmt == "parquet":
+        pa = _pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+    else:
+        raise ValueError(f"Unknown format {fmt!r}.")
+
+def _blank(value):
+    return None if value in ("", None) else value
+
+def _progress_row(rec, new_ids=False):
+    score = _blank(rec.get("score"))
+    row_id = None if new_ids else _blank(rec.get("id"))
+    return (
+        int(row_id) if row_id is not None else None,
+        int(rec["user_id"]),
+        rec["module"],
+        float(score) if score is not None else None,
+        rec.get("details") or "",
+        _blank(rec.get("timestamp")) or utc_timestamp(),
+    )
+
+def _user_row(rec):
+    return (int(rec["id"]), rec["username"], _blank(rec.get("email")), _blank(rec.get("password")))
+
+def import_table(table, path, fmt=None, chunk_size=CHUNK_ROWS, new_ids=False) -> int:
+    """
+    Streams a file produced by export_table back into the database, one
+    transaction per chunk; returns the number of rows read. Rows keep
+    their ids and existing ones are skipped; with new_ids, progress rows
+    are all added under new ids.
+    """
+    fmt = detect_format(path, fmt)
+    db.init_db()
+    if table == "progress":
+        convert, save = (lambda rec: _progress_row(rec, new_ids)), db.import_progress_many
+    elif table == "users":
+        convert, save = _user_row, db.save_users_many
+    else:
+        raise ValueError(f"Unknown table {table!r}; use 'progress' or 'users'.")
+
+    count = 0
+    for records in _read_records(path, fmt, chunk_size):
+        save([convert(rec) for rec in records])
+        count += len(records)
+    return count
+
+# ------------------------------------
+# CLI
+# ------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Export or import learner progress.")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("table", choices=["progress", "users"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    parser.add_argument("--start", help="first timestamp to include (UTC, YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--end", help="first timestamp to exclude")
+    parser.add_argument("--module")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--include-passwords", action="store_true")
+    parser.add_argument("--new-ids", action="store_true",
+                        help="import: add every progress row under a new id instead of skipping known ids")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--db", default=db.DB_PATH)
+    args = parser.parse_args()
+
+    db.DB_PATH = args.db
+    if args.action == "export":
+        count = export_table(args.table, args.path, args.format, args.start, args.end, args.module,
+                             args.user_id, args.include_passwords, args.chunk_size)
+        print(f"Exported {count} {args.table} rows to {args.path}.")
+    else:
+        count = import_table(args.table, args.path, args.format, args.chunk_size, args.new_ids)
+        print(f"Imported {count} {args.table} rows from {args.path}.")
+
+
+if __name__ == "__main__":
+    main()
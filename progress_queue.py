@@ -0,0 +1,209 @@
+import os
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timezone
+import db
+
+# ------------------------------------
+# Write-behind queue for progress rows
+# ------------------------------------
+# record() only appends to an in-process queue, so a Streamlit script
+# never waits on SQLite's write lock. One background thread groups the
+# queued rows and writes each group with a single executemany
+# transaction, once BATCH_SIZE rows are waiting or FLUSH_INTERVAL
+# seconds after the oldest one arrived. A failed transaction keeps its
+# rows and is retried on its own schedule, backing off up to
+# MAX_RETRY_INTERVAL. Pending rows are flushed at exit.
+
+BATCH_SIZE = int(os.getenv("PROGRESS_BATCH_SIZE", 200))
+FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", 0.5))
+MAX_PENDING = int(os.getenv("PROGRESS_MAX_PENDING", 10000))
+MAX_RETRY_INTERVAL = float(os.getenv("PROGRESS_MAX_RETRY_INTERVAL", 30))
+
+_STOP = object()
+
+def utc_timestamp() -> str:
+    """Same format as SQLite's CURRENT_TIMESTAMP."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ProgressWriter:
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._retry = []
+        self._unwritten = 0
+        self._atexit = False
+        self.stats = {
+            "enqueued": 0,          # rows accepted by record()
+            "written": 0,           # rows committed to SQLite
+            "batches": 0,           # committed transactions
+            "sync_fallbacks": 0,    # rows written inline because the queue was full
+            "failed_flushes": 0,    # transactions that raised and were retried
+            "rejected": 0,          # rows that failed on their own with a non-SQLite error
+            "dropped": 0,           # rows still unwritten at shutdown
+            "max_depth": 0,
+            "last_flush": None,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                self._thread.start()
+                if not self._atexit:
+                    atexit.register(self.stop)
+                    self._atexit = True
+
+    def record(self, user_id, module, score, details):
+        """Queues one progress row; returns immediately."""
+        row = (user_id, module, score, details, utc_timestamp())
+        self.start()
+        with self._lock:
+            self._unwritten += 1
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Backpressure: write this row inline rather than lose it.
+            db.init_db()
+            db.save_progress_many([row])
+            with self._lock:
+                self._unwritten -= 1
+                self.stats["sync_fallbacks"] += 1
+                self.stats["written"] += 1
+            return
+        with self._lock:
+            self.stats["enqueued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+
+    def pending(self) -> int:
+        """Rows accepted but not yet committed (queued, batching or retrying)."""
+        return self._unwritten
+
+    def stop(self, timeout=10.0):
+        """Flushes everything queued and stops the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ------------------------------------
+    # Writer thread
+    # ------------------------------------
+    def _run(self):
+        batch = []
+        deadline = None
+        backoff = self.flush_interval
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(batch)
+                self._drain_and_exit()
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if (batch or self._retry) and (len(batch) >= self.batch_size or due):
+                if self._flush(batch):
+                    backoff = self.flush_interval
+                    deadline = None
+                else:
+                    # Retry the kept rows later even if nothing new arrives.
+                    backoff = min(backoff * 2, MAX_RETRY_INTERVAL)
+                    deadline = time.monotonic() + backoff
+                batch = []
+
+    def _drain_and_exit(self):
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        self._flush(rest)
+        if self._retry:
+            with self._lock:
+                self.stats["dropped"] += len(self._retry)
+                self._unwritten -= len(self._retry)
+            self._retry = []
+        db.close_conn()
+
+    def _flush(self, batch) -> bool:
+        """Writes the retry rows plus batch; False if rows are left to retry."""
+        rows = self._retry + batch
+        self._retry = []
+        if not rows:
+            return True
+        try:
+            db.init_db()
+            db.save_progress_many(rows)
+        except sqlite3.OperationalError:
+            # Locked or unavailable: keep the rows for the next attempt.
+            with self._lock:
+                self.stats["failed_flushes"] += 1
+            self._retry = rows
+            return False
+        except Exception:
+            # A row SQLite (or the rollup) can't take: write them one by
+            # one so only the bad ones are lost, not the whole batch.
+            with self._lock:
+                self.stats["failed_flushes"] += 1
+            return self._flush_each(rows)
+        self._written(len(rows))
+        return True
+
+    def _flush_each(self, rows) -> bool:
+        for row in rows:
+            try:
+                db.save_progress_many([row])
+            except sqlite3.OperationalError:
+                self._retry.append(row)
+            except Exception:
+                with self._lock:
+                    self._unwritten -= 1
+                    self.stats["rejected"] += 1
+            else:
+                self._written(1)
+        return not self._retry
+
+    def _written(self, count):
+        with self._lock:
+            self._unwritten -= count
+            self.stats["written"] += count
+            self.stats["batches"] += 1
+            self.stats["last_flush"] = time.time()
+
+
+writer = ProgressWriter()
+
+def record(user_id, module, score, details=""):
+    """Queues a progress row for the background writer."""
+    writer.record(user_id, module, score, details)
+
+def flush(timeout=10.0):
+    """Blocks until everything queued so far is written (or timeout)."""
+    end = time.monotonic() + timeout
+    while writer.pending() and time.monotonic() < end:
+        time.sleep(0.01)
+
+def get_stats():
+    stats = dict(writer.stats)
+    stats["pending"] = writer.pending()
+    return stats
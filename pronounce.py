@@ -1,10 +1,5 @@
-# app.py
 import streamlit as st
-from gtts import gTTS
-import tempfile
-import os
-
-st.set_page_config(page_title="Word Pronunciation", page_icon="🔊")
+import tts
 
 def pronounce_word():
     st.header("🔊 Word Pronunciation Practice")
@@ -15,15 +10,13 @@ def pronounce_word():
     if word:
         st.write(f"📖 Word selected: **{word}**")
 
-        # Step 2: AI Pronunciation (gTTS)
-        tts = gTTS(word, lang="en")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmpfile:
-            tts.save(tmpfile.name)
-            st.audio(tmpfile.name, format="audio/mp3")
+        # Step 2: AI Pronunciation (gTTS, served from the shared audio cache)
+        st.audio(tts.synthesize(word), format="audio/mp3")
 
         st.info("👆 Listen to the AI pronunciation")
 
 def main():
+    st.set_page_config(page_title="Word Pronunciation", page_icon="🔊")
     pronounce_word()
 
 if __name__ == "__main__":
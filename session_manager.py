@@ -1,83 +1,537 @@
+import os
+import abc
+import json
+import math
 import time
-from datetime import date
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+import db
+import progress_queue
 
 # ------------------------------------
-# In-memory user session store
+# User session records
+# ------------------------------------
+# One slotted record per user. Practice history is kept in bounded,
+# array-backed ring buffers (minutes, score and ordinal day share one
+# write position), so a session never grows past HISTORY_LEN entries.
+# Sessions sit in an OrderedDict ordered by last_seen: touching a user
+# moves it to the end, and expiry pops from the front until it meets a
+# live session, so a sweep costs O(expired) rather than O(all sessions).
+
+HISTORY_LEN = int(os.getenv("SESSION_HISTORY_LEN", 30))
+WEAK_AREAS_LEN = int(os.getenv("SESSION_WEAK_AREAS_LEN", 10))
+SESSION_TTL = int(os.getenv("SESSION_TTL", 3600))
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")   # "memory" or "sqlite"
+EWMA_ALPHA = float(os.getenv("SESSION_EWMA_ALPHA", 0.3))
+WEAK_AREAS_TRACKED = int(os.getenv("SESSION_WEAK_AREAS_TRACKED", 8))
+
+
+def utc_today() -> date:
+    """Today in UTC, the calendar progress_daily uses."""
+    return datetime.now(timezone.utc).date()
+
+
+class PracticeStats:
+    """
+    Running aggregates over all of a user's practice, updated in O(1) per
+    practice: count, mean and variance (Welford), an exponentially
+    weighted recent score, daily streaks (UTC days), and the most
+    frequent weak areas (Space-Saving counter, at most
+    WEAK_AREAS_TRACKED entries). A session gets them on first use,
+    rebuilt from the progress tables, so they outlive session expiry.
+    """
+    __slots__ = ("count", "mean", "m2", "recent", "streak", "best_streak", "last_day", "weak_counts")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0            # sum of squared deviations from the mean
+        self.recent = None       # EWMA of the score
+        self.streak = 0          # consecutive days ending on last_day
+        self.best_streak = 0
+        self.last_day = 0        # date.toordinal() of the latest practice
+        self.weak_counts = {}    # area -> (approximate) count
+
+    def add(self, score, day, weak_area=None):
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (score - self.mean)
+        self.recent = score if self.recent is None else EWMA_ALPHA * score + (1 - EWMA_ALPHA) * self.recent
+        self.add_day(day)
+
+        if weak_area:
+            counts = self.weak_counts
+            if weak_area in counts or len(counts) < WEAK_AREAS_TRACKED:
+                counts[weak_area] = counts.get(weak_area, 0) + 1
+            else:
+                # Replace the rarest area; the newcomer inherits its count.
+                rarest = min(counts, key=counts.get)
+                counts[weak_area] = counts.pop(rarest) + 1
+
+    def add_day(self, day):
+        """Counts practice on `day` (an ordinal) towards the streaks, scored or not."""
+        if day == self.last_day + 1:
+            self.streak += 1
+        elif day > self.last_day:
+            self.streak = 1
+        self.last_day = max(self.last_day, day)
+        self.best_streak = max(self.best_streak, self.streak)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def current_streak(self, today=None):
+        """The streak, or 0 once a whole day has passed without practice."""
+        today = (today or utc_today()).toordinal()
+        return self.streak if today - self.last_day <= 1 else 0
+
+    def top_weak_areas(self, k=3):
+        return sorted(self.weak_counts.items(), key=lambda item: -item[1])[:k]
+
+    def copy(self):
+        other = PracticeStats.__new__(PracticeStats)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.weak_counts = dict(self.weak_counts)
+        return other
+
+    def to_json(self):
+        return json.dumps([getattr(self, name) for name in self.__slots__])
+
+    @classmethod
+    def from_json(cls, text):
+        stats = cls()
+        for name, value in zip(cls.__slots__, json.loads(text)):
+            setattr(stats, name, value)
+        return stats
+
+    @classmethod
+    def from_progress(cls, user_id):
+        """Rebuilds the aggregates from the user's stored progress."""
+        db.init_db()
+        stats = cls()
+        count, mean, m2, latest, last_day, areas = db.get_score_summary(user_id, WEAK_AREAS_TRACKED)
+        stats.count, stats.mean, stats.m2, stats.recent = count, mean, m2, latest
+        stats.streak, stats.best_streak = db.get_streak(user_id)
+        stats.last_day = date.fromisoformat(last_day).toordinal() if last_day else 0
+        stats.weak_counts = dict(areas)
+        return stats
+
+
+class UserSession:
+    __slots__ = ("minutes", "scores", "days", "head", "weak_areas", "current_page", "last_seen", "version", "stats")
+
+    def __init__(self):
+        self.minutes = array("H")      # minutes per session, 0–65535
+        self.scores = array("B")       # speaking score, 0–100
+        self.days = array("I")         # date.toordinal() of each session
+        self.head = 0                  # next slot to overwrite once full
+        self.weak_areas = None         # list[str], created on first use
+        self.current_page = "home"     # navigation state
+        self.last_seen = time.time()
+        self.version = 0               # bumped by every saved change
+        self.stats = None              # PracticeStats, created on first use
+
+    def copy(self):
+        other = UserSession.__new__(UserSession)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.minutes = array("H", self.minutes)
+        other.scores = array("B", self.scores)
+        other.days = array("I", self.days)
+        other.weak_areas = list(self.weak_areas) if self.weak_areas else None
+        other.stats = self.stats.copy() if self.stats else None
+        return other
+
+    def to_fields(self):
+        """Values for db.SESSION_FIELDS."""
+        return (
+            self.last_seen, self.current_page, self.head,
+            self.minutes.tobytes(), self.scores.tobytes(), self.days.tobytes(),
+            json.dumps(self.weak_areas) if self.weak_areas else None,
+            self.stats.to_json() if self.stats else None,
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a record from a db.load_session() row."""
+        version, last_seen, current_page, head, minutes, scores, days, weak_areas, stats = row
+        session = cls.__new__(cls)
+        session.version = version
+        session.last_seen = last_seen
+        session.current_page = current_page or "home"
+        session.head = head
+        session.minutes = array("H", minutes or b"")
+        session.scores = array("B", scores or b"")
+        session.days = array("I", days or b"")
+        session.weak_areas = json.loads(weak_areas) if weak_areas else None
+        session.stats = PracticeStats.from_json(stats) if stats else None
+        return session
+
+    def add_practice(self, minutes, speaking_score, day=None, weak_area=None):
+        minutes = min(max(int(minutes), 0), 0xFFFF)
+        score = min(max(int(round(speaking_score)), 0), 100)
+        day = (day or utc_today()).toordinal()
+        if len(self.minutes) < HISTORY_LEN:
+            self.minutes.append(minutes)
+            self.scores.append(score)
+            self.days.append(day)
+        else:
+            i = self.head
+            self.minutes[i] = minutes
+            self.scores[i] = score
+            self.days[i] = day
+            self.head = (i + 1) % HISTORY_LEN
+        if self.stats is None:
+            self.stats = PracticeStats()
+        self.stats.add(score, day, weak_area)
+
+        if weak_area:
+            if self.weak_areas is None:
+                self.weak_areas = []
+            elif len(self.weak_areas) >= WEAK_AREAS_LEN:
+                del self.weak_areas[0]
+            self.weak_areas.append(weak_area)
+
+    def _ordered(self, ring):
+        # Oldest first, whether or not the ring has wrapped yet.
+        return ring[self.head:].tolist() + ring[:self.head].tolist()
+
+    # Read-only view with the old dict layout, oldest entry first.
+    def __getitem__(self, key):
+        if key == "practice_time":
+            return self._ordered(self.minutes)
+        if key == "speaking_score":
+            return self._ordered(self.scores)
+        if key == "dates":
+            return [date.fromordinal(d) for d in self._ordered(self.days)]
+        if key == "weak_areas":
+            return list(self.weak_areas or ())
+        if key in ("current_page", "last_seen"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# ------------------------------------
+# Backends
+# ------------------------------------
+# All reads and writes go through one backend per process, chosen by
+# SESSION_BACKEND. Writes pass a mutate(session) function, so a backend
+# can re-read and re-apply it when another writer changed the session
+# first (optimistic versioning).
+
+class SessionConflict(RuntimeError):
+    pass
+
+
+class SessionBackend(abc.ABC):
+    @abc.abstractmethod
+    def get(self, user_id) -> UserSession:
+        """Returns the user's session (creating it) and marks it as seen."""
+
+    @abc.abstractmethod
+    def update(self, user_id, mutate) -> UserSession:
+        """Applies mutate(session) and stores the result; returns it."""
+
+    @abc.abstractmethod
+    def delete(self, user_id):
+        """Forgets the user's session."""
+
+    @abc.abstractmethod
+    def expire(self, timeout=None) -> int:
+        """Drops sessions idle for longer than timeout; returns how many."""
+
+
+class SessionStore:
+    """user_id -> UserSession, kept in last_seen order."""
+
+    def __init__(self, ttl=SESSION_TTL, sessions=None):
+        self.ttl = ttl
+        self._sessions = OrderedDict() if sessions is None else sessions
+        self._lock = threading.Lock()
+
+    def touch(self, user_id) -> UserSession:
+        """Returns the user's session (creating it) and marks it as just seen."""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None:
+                session = self._sessions[user_id] = UserSession()
+            else:
+                self._sessions.move_to_end(user_id)
+            session.last_seen = now
+            self._expire(now, self.ttl)
+        return session
+
+    def discard(self, user_id):
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+    def expire(self, timeout=None) -> int:
+        """Drops sessions idle for longer than timeout; returns how many."""
+        with self._lock:
+            return self._expire(time.time(), self.ttl if timeout is None else timeout)
+
+    def _expire(self, now, timeout):
+        removed = 0
+        sessions = self._sessions
+        while sessions:
+            user_id = next(iter(sessions))
+            if now - sessions[user_id].last_seen <= timeout:
+                break
+            del sessions[user_id]
+            removed += 1
+        return removed
+
+    def __contains__(self, user_id):
+        return user_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+# The memory backend's store, kept under its old name: user_id -> UserSession.
+USER_SESSIONS = OrderedDict()
+
+
+class MemoryBackend(SessionStore, SessionBackend):
+    """Process-local sessions: fastest, but lost on restart and not shared."""
+
+    def __init__(self, ttl=SESSION_TTL, sessions=None):
+        super().__init__(ttl, USER_SESSIONS if sessions is None else sessions)
+
+    def get(self, user_id):
+        return self.touch(user_id)
+
+    def update(self, user_id, mutate):
+        session = self.touch(user_id)
+        with self._lock:
+            mutate(session)
+            session.version += 1
+        return session
+
+    def delete(self, user_id):
+        self.discard(user_id)
+
+
+# The SQLite backend keeps sessions in db.py's user_sessions table, so
+# every worker process sees the same state and it survives restarts.
+# Reads go through a local LRU cache: an entry younger than CACHE_TTL is
+# served as is, an older one costs a primary-key version lookup and is
+# only reloaded when another process has changed it.
+
+CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", 1.0))
+LOCAL_CACHE_SIZE = int(os.getenv("SESSION_LOCAL_CACHE_SIZE", 10000))
+TOUCH_INTERVAL = float(os.getenv("SESSION_TOUCH_INTERVAL", 30))
+SWEEP_INTERVAL = 60.0
+MAX_RETRIES = 5
+
+
+class SQLiteBackend(SessionBackend):
+    def __init__(self, ttl=SESSION_TTL, cache_ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.cache_ttl = cache_ttl
+        self._cache = OrderedDict()     # user_id -> (session, last checked)
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def _remember(self, user_id, session):
+        with self._lock:
+            self._cache[user_id] = (session, time.monotonic())
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > LOCAL_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _read(self, user_id, verify=False):
+        db.init_db()
+        with self._lock:
+            entry = self._cache.get(user_id)
+        if entry is not None:
+            session, checked = entry
+            if not verify and time.monotonic() - checked < self.cache_ttl:
+                return session
+            if db.get_session_version(user_id) == session.version:
+                self._remember(user_id, session)
+                return session
+        row = db.load_session(user_id)
+        session = UserSession.from_row(row) if row else UserSession()
+        self._remember(user_id, session)
+        return session
+
+    def get(self, user_id):
+        session = self._read(user_id)
+        now = time.time()
+        # last_seen is only written back every TOUCH_INTERVAL seconds.
+        if now - session.last_seen > TOUCH_INTERVAL:
+            session.last_seen = now
+            if session.version:
+                db.touch_session(user_id, now)
+        if now >= self._next_sweep:
+            self._next_sweep = now + SWEEP_INTERVAL
+            self.expire()
+        return session
+
+    def update(self, user_id, mutate):
+        session = self._read(user_id)
+        for _ in range(MAX_RETRIES):
+            draft = session.copy()
+            mutate(draft)
+            draft.last_seen = time.time()
+            if db.save_session(user_id, session.version, draft.to_fields()):
+                draft.version = session.version + 1
+                self._remember(user_id, draft)
+                return draft
+            # Someone else wrote first: start again from their version.
+            session = self._read(user_id, verify=True)
+        raise SessionConflict(f"Session {user_id} kept changing; gave up after {MAX_RETRIES} attempts.")
+
+    def delete(self, user_id):
+        db.init_db()
+        db.delete_session(user_id)
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def expire(self, timeout=None):
+        # Cached copies of expired sessions are dropped on their next
+        # version check, when the row is found missing.
+        db.init_db()
+        return db.expire_sessions(time.time() - (self.ttl if timeout is None else timeout))
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> SessionBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if SESSION_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown SESSION_BACKEND {SESSION_BACKEND!r}; use one of {sorted(BACKENDS)}.")
+                _backend = BACKENDS[SESSION_BACKEND]()
+    return _backend
+
+def set_backend(backend: SessionBackend):
+    """Replaces the process-wide backend (e.g. SQLiteBackend() in a worker)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+# ------------------------------------
+# Session API
 # ------------------------------------
-USER_SESSIONS = {}
 
 def create_empty_session():
     """
     Creates a fresh session structure for a new user.
     """
-    return {
-        "practice_time": [],      # list[int]  – minutes per session
-        "speaking_score": [],     # list[int]  – 0–100
-        "dates": [],              # list[date] – practice dates
-        "weak_areas": [],         # list[str]
-        "current_page": "home",   # navigation state
-        "last_seen": time.time()
-    }
+    return UserSession()
 
 def get_user_session(user_id):
     """
-    Returns the user's session map.
+    Returns the user's session record.
     Creates one if it does not exist.
     """
-    if user_id not in USER_SESSIONS:
-        USER_SESSIONS[user_id] = create_empty_session()
-
-    USER_SESSIONS[user_id]["last_seen"] = time.time()
-    return USER_SESSIONS[user_id]
+    return get_backend().get(user_id)
 
 def update_practice(
     user_id,
     minutes: int,
-    speaking_score: int,
-    weak_area: str | None = None
+    speaking_score: int | None,
+    weak_area: str | None = None,
+    activity: str = "practice"
 ):
     """
     Update user session after a practice activity.
+    The result is also queued for the progress table (write-behind),
+    with the activity ("assessment", "interview", "speaking") as module.
+    Unscored practice (speaking_score None, e.g. a conversation) counts
+    towards the streaks but stays out of the session's score history.
     """
-    session = get_user_session(user_id)
+    seed = _stats_seed(user_id)
+
+    def mutate(session):
+        _seed_stats(session, seed)
+        if speaking_score is None:
+            session.stats.add_day(utc_today().toordinal())
+        else:
+            session.add_practice(minutes, speaking_score, weak_area=weak_area)
+
+    get_backend().update(user_id, mutate)
 
-    session["practice_time"].append(minutes)
-    session["speaking_score"].append(speaking_score)
-    session["dates"].append(date.today())
+    details = {"minutes": minutes, "weak_area": weak_area}
+    progress_queue.record(user_id, activity, speaking_score, json.dumps(details))
 
-    if weak_area:
-        session["weak_areas"].append(weak_area)
+def elapsed_minutes(started: float, limit: int = 120) -> int:
+    """Whole minutes since `started` (time.time()), at least 1, at most `limit`."""
+    return min(max(math.ceil((time.time() - started) / 60), 1), limit)
 
 def set_current_page(user_id, page: str):
     """
     Track user navigation per session.
     """
-    session = get_user_session(user_id)
-    session["current_page"] = page
+    if get_user_session(user_id).current_page == page:
+        return
+    get_backend().update(user_id, lambda session: setattr(session, "current_page", page))
 
 def get_current_page(user_id) -> str:
     """
     Get last visited page for user.
     """
     session = get_user_session(user_id)
-    return session.get("current_page", "home")
+    return session.current_page
 
 def clear_user_session(user_id):
     """
     Completely removes user session (on logout).
     """
-    if user_id in USER_SESSIONS:
-        del USER_SESSIONS[user_id]
+    get_backend().delete(user_id)
 
 def cleanup_inactive_sessions(timeout: int = 3600):
     """
     Removes inactive sessions to save memory.
     """
-    now = time.time()
-    inactive_users = [
-        uid for uid, session in USER_SESSIONS.items()
-        if now - session["last_seen"] > timeout
-    ]
+    return get_backend().expire(timeout)
+
+def _stats_seed(user_id):
+    """Aggregates rebuilt from progress if the user's session has none yet, else None."""
+    if get_user_session(user_id).stats is None:
+        return PracticeStats.from_progress(user_id)
+    return None
+
+def _seed_stats(session, seed):
+    if session.stats is None:
+        session.stats = seed.copy() if seed else PracticeStats()
 
-    for uid in inactive_users:
-        del USER_SESSIONS[uid]
+def get_user_stats(user_id) -> dict:
+    """
+    Running practice statistics for a user, read from the session's
+    aggregates. Only a session that has none yet (new, or expired) reads
+    the progress tables, once, to rebuild them.
+    """
+    session = get_user_session(user_id)
+    if session.stats is None:
+        seed = _stats_seed(user_id)
+        session = get_backend().update(user_id, lambda session: _seed_stats(session, seed))
+    stats = session.stats
+    return {
+        "attempts": stats.count,
+        "mean_score": stats.mean,
+        "score_variance": stats.variance(),
+        "score_stddev": stats.variance() ** 0.5,
+        "recent_score": stats.recent,
+        "current_streak": stats.current_streak(),
+        "best_streak": stats.best_streak,
+        "top_weak_areas": stats.top_weak_areas(),
+    }
@@ -0,0 +1,80 @@
+import hashlib
+from collections import OrderedDict
+import streamlit as st
+
+# ------------------------------------
+# Per-session result store
+# ------------------------------------
+# Streamlit reruns the whole page on every widget click, and a recorded
+# st.audio_input value survives those reruns. Results are stored here
+# keyed by hash(task, content) so each recording or typed answer is
+# transcribed and scored exactly once per session. Producers mark an
+# error message they return or yield with Failed(...); such results are
+# shown but not remembered, so a retry can succeed.
+
+STORE_KEY = "_result_store"
+MAX_RESULTS = 32
+
+class Failed(str):
+    """An error message given in place of a result."""
+
+
+def result_key(task: str, content) -> str:
+    h = hashlib.sha256(task.encode("utf-8"))
+    h.update(b"\0")
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    h.update(content)
+    return h.hexdigest()
+
+def _store() -> OrderedDict:
+    if STORE_KEY not in st.session_state:
+        st.session_state[STORE_KEY] = OrderedDict()
+    return st.session_state[STORE_KEY]
+
+def _keep(store, key, value, ok):
+    if not ok:
+        return
+    store[key] = value
+    while len(store) > MAX_RESULTS:
+        store.popitem(last=False)
+
+def remember(task: str, content, compute):
+    """
+    Returns the stored result for (task, content), calling compute() on a miss.
+    """
+    store = _store()
+    key = result_key(task, content)
+    if key in store:
+        store.move_to_end(key)
+        return store[key]
+    value = compute()
+    _keep(store, key, value, ok=not isinstance(value, Failed))
+    return value
+
+def stream_once(task: str, content, make_stream, on_result=None):
+    """
+    Streams make_stream() with st.write_stream the first time, then
+    repaints the stored text on later reruns. Returns the full text.
+    on_result(text) runs once, when a new result is stored.
+    """
+    store = _store()
+    key = result_key(task, content)
+    if key in store:
+        store.move_to_end(key)
+        st.markdown(store[key])
+        return store[key]
+    failed = False
+
+    def watch(stream):
+        # A stream can fail midway, after some text was already shown.
+        nonlocal failed
+        for piece in stream:
+            failed = failed or isinstance(piece, Failed)
+            yield piece
+
+    value = st.write_stream(watch(make_stream()))
+    _keep(store, key, value, ok=not failed)
+    if on_result and not failed:
+        on_result(value)
+    return value
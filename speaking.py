@@ -1,32 +1,18 @@
-import os
+import time
 import streamlit as st
-from dotenv import load_dotenv
-from groq import Groq
-
-# -------------------------------
-# Load Environment
-# -------------------------------
-load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
-
-if not groq_api_key:
-    st.error("⚠️ Missing GROQ_API_KEY. Please add it to your .env file.")
-else:
-    client = Groq(api_key=groq_api_key)
+import llm_gateway
+import session_manager
 
 # -------------------------------
 # Get AI Response
 # -------------------------------
-def chat_with_groq(conversation_history, scenario):
-    if not groq_api_key:
-        return "⚠️ GROQ_API_KEY not found. Please configure your environment."
-
+def build_partner_prompt(conversation_history, scenario):
     # Format conversation text
     formatted_history = "\n".join(
         [f"{msg['role'].capitalize()}: {msg['content']}" for msg in conversation_history]
     )
 
-    prompt = f"""
+    return f"""
     You are a friendly English-speaking partner.
     Scenario: {scenario}
 
@@ -40,17 +26,32 @@ def chat_with_groq(conversation_history, scenario):
     Now reply as the AI partner.
     """
 
+def chat_with_groq(conversation_history, scenario):
+    if not llm_gateway.has_api_key():
+        return "⚠️ GROQ_API_KEY not found. Please configure your environment."
+
+    prompt = build_partner_prompt(conversation_history, scenario)
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=200,
-            temperature=0.8
-        )
-        return response.choices[0].message.content.strip()
+        return llm_gateway.ask(prompt, max_tokens=200, temperature=0.8)
     except Exception as e:
         return f"⚠️ Error getting AI response: {str(e)}"
 
+def stream_with_groq(conversation_history, scenario):
+    """
+    Streaming version of chat_with_groq, for st.write_stream.
+    """
+    if not llm_gateway.has_api_key():
+        yield "⚠️ GROQ_API_KEY not found. Please configure your environment."
+        return
+
+    prompt = build_partner_prompt(conversation_history, scenario)
+    try:
+        yield from llm_gateway.ask_stream(
+            prompt, max_tokens=200, temperature=0.8, label="speaking_partner"
+        )
+    except Exception as e:
+        yield f"⚠️ Error getting AI response: {str(e)}"
+
 
 # -------------------------------
 # Speaking Conversation Module
@@ -58,6 +59,9 @@ def chat_with_groq(conversation_history, scenario):
 def speaking_practice():
     st.title("🎙️ AI Speaking Partner")
 
+    if not llm_gateway.has_api_key():
+        st.error("⚠️ Missing GROQ_API_KEY. Please add it to your .env file.")
+
     scenario = st.selectbox(
         "Choose a conversation scenario:",
         ["Ordering Food at a Restaurant", "Booking a Taxi", "Job Interview", "Casual Chat"]
@@ -75,6 +79,7 @@ def speaking_practice():
     if not st.session_state.active:
         if st.button("▶️ Start Conversation"):
             st.session_state.active = True
+            st.session_state.conversation_started = time.time()
             if scenario == "Ordering Food at a Restaurant":
                 first_question = "👋 Hello! Welcome to our restaurant. What would you like to order today?"
             elif scenario == "Booking a Taxi":
@@ -109,11 +114,22 @@ def speaking_practice():
 
         if send and user_input.strip():
             st.session_state.conversation.append({"role": "user", "content": user_input})
-            ai_reply = chat_with_groq(st.session_state.conversation, scenario)
+            st.markdown(f"**🧑 You:** {user_input}")
+            st.markdown("**🤖 AI:**")
+            ai_reply = st.write_stream(stream_with_groq(st.session_state.conversation, scenario))
             st.session_state.conversation.append({"role": "ai", "content": ai_reply})
             st.rerun()
 
         if stop:
+            # Count the conversation as practice once the learner has replied.
+            if any(msg["role"] == "user" for msg in st.session_state.conversation):
+                started = st.session_state.get("conversation_started", time.time())
+                session_manager.update_practice(
+                    st.session_state.user["id"],
+                    session_manager.elapsed_minutes(started),
+                    None,
+                    activity="speaking"
+                )
             st.session_state.active = False
             st.success("✅ Conversation Ended. Great job practicing!")
             st.session_state.conversation = []
@@ -2,7 +2,9 @@ import time
 import jwt
 import os
 from fastapi import FastAPI
+from fastapi.responses import Response
 from dotenv import load_dotenv
+import metrics
 
 load_dotenv()
 app = FastAPI()
@@ -27,10 +29,15 @@ def generate_token():
         }
     }
 
-    token = jwt.encode(
-        payload,
-        LIVEKIT_API_SECRET,
-        algorithm="HS256"
-    )
+    with metrics.timed("token.sign"):
+        token = jwt.encode(
+            payload,
+            LIVEKIT_API_SECRET,
+            algorithm="HS256"
+        )
 
     return token
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
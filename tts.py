@@ -1,11 +1,147 @@
-from gtts import gTTS
+import io
+import os
+import re
+import sys
+import json
+import hashlib
 import tempfile
+import threading
+import metrics
 
-def speak_text(text: str) -> str:
+# ------------------------------------
+# Content-addressed MP3 cache
+# ------------------------------------
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(".cache", "tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+_KEY_RE = re.compile(r"[0-9a-f]{64}")
+_evict_lock = threading.Lock()
+_cache_bytes = None  # running estimate, so a miss does not rescan the folder
+
+def cache_key(text: str, lang: str = "en", voice: str = "com") -> str:
+    """
+    Hash of everything that changes the audio.
+    `voice` is the gTTS top-level domain (accent), e.g. "com", "co.uk".
+    """
+    payload = json.dumps([text, lang, voice], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_path(key: str) -> str:
+    return os.path.join(TTS_CACHE_DIR, key[:2], key + ".mp3")
+
+def load_cached(key: str) -> bytes | None:
+    """
+    Returns cached MP3 bytes for a key, or None.
+    Reading a file refreshes its position in the LRU order.
+    """
+    if not _KEY_RE.fullmatch(key):
+        return None
+    path = cache_path(key)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+def synthesize(text: str, lang: str = "en", voice: str = "com") -> bytes:
+    """
+    Returns MP3 bytes for `text`, calling gTTS only on a cache miss.
+    """
+    key = cache_key(text, lang, voice)
+    with metrics.timed("tts") as call:
+        data = load_cached(key)
+        call["cache"] = "miss" if data is None else "hit"
+        if data is None:
+            from gtts import gTTS  # only needed on a miss
+
+            buf = io.BytesIO()
+            gTTS(text=text, lang=lang, tld=voice).write_to_fp(buf)
+            data = buf.getvalue()
+            _store(key, data)
+        call["bytes"] = len(data)
+    return data
+
+def speak_text(text: str, lang: str = "en", voice: str = "com") -> str:
     """
     Converts text to speech and returns the audio file path
+    (the shared cache file, so callers must not delete it).
     """
-    tts = gTTS(text=text, lang="en")
-    temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    tts.save(temp_audio.name)
-    return temp_audio.name
+    synthesize(text, lang, voice)
+    return cache_path(cache_key(text, lang, voice))
+
+text_to_speech = speak_text
+
+def _store(key: str, data: bytes):
+    path = cache_path(key)
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+
+    # Write to a private temp file, then rename: concurrent writers
+    # of the same key never expose a half-written MP3.
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _account(len(data))
+
+def _account(added: int):
+    global _cache_bytes
+    with _evict_lock:
+        if _cache_bytes is None:
+            _cache_bytes = _scan_and_evict()
+            return
+        _cache_bytes += added
+        if _cache_bytes > TTS_CACHE_MAX_BYTES:
+            _cache_bytes = _scan_and_evict()
+
+def _scan_and_evict() -> int:
+    """
+    Deletes least recently used files until the cache fits its quota.
+    Returns the size of what is left.
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(TTS_CACHE_DIR):
+        for name in files:
+            if not name.endswith(".mp3"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+
+    if total <= TTS_CACHE_MAX_BYTES:
+        return total
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= TTS_CACHE_MAX_BYTES:
+            break
+    return total
+
+def prewarm(words, lang: str = "en", voice: str = "com"):
+    """
+    Fills the cache for a list of words ahead of time.
+    """
+    for word in words:
+        word = word.strip()
+        if word:
+            synthesize(word, lang, voice)
+
+if __name__ == "__main__":
+    # python tts.py words.txt  -> prewarm the pronunciation cache
+    for file_name in sys.argv[1:]:
+        with open(file_name, encoding="utf-8") as f:
+            prewarm(f)
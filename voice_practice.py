@@ -1,41 +1,17 @@
+import time
 import streamlit as st
-import tempfile
-import os
-from groq import Groq
-from dotenv import load_dotenv
-
-# ------------------------------
-# Load environment variables
-# ------------------------------
-load_dotenv()
-
-groq_api_key = os.getenv("GROQ_API_KEY")
-
-if not groq_api_key:
-    st.error("❌ GROQ_API_KEY not found. Please set it in .env file.")
-    st.stop()
-
-client = Groq(api_key=groq_api_key)
+import ai_logic
+import llm_gateway
+import audio_ingest
+import session_results
+import session_manager
 
 # ------------------------------
 # Generate one interview question
 # ------------------------------
 def generate_question(role: str, difficulty: str):
-    prompt = f"""
-    You are an expert HR interviewer.
-    Generate ONE {difficulty}-level interview question for a candidate applying as a {role}.
-    Respond with only the question text.
-    """
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are an experienced HR interviewer."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150
-        )
-        return response.choices[0].message.content.strip()
+        return ai_logic.generate_question(role, difficulty)
     except Exception as e:
         st.error(f"⚠️ Error generating question: {e}")
         return "Tell me about yourself."
@@ -43,44 +19,32 @@ def generate_question(role: str, difficulty: str):
 # ------------------------------
 # Transcribe audio
 # ------------------------------
-def transcribe_with_groq(audio_path: str) -> str:
+def transcribe_with_groq(audio_file) -> str:
     try:
-        with open(audio_path, "rb") as f:
-            response = client.audio.transcriptions.create(
-                file=f,
-                model="whisper-large-v3",
-                response_format="text"
-            )
-        return response.strip()
+        return llm_gateway.transcribe(audio_file)
     except Exception as e:
-        return f"⚠️ Error in transcription: {str(e)}"
+        return session_results.Failed(f"⚠️ Error in transcription: {str(e)}")
+
+def transcribe_recording(audio) -> str:
+    # Send the recording straight from memory, no temp file.
+    with audio_ingest.measure("interview") as stats:
+        stats["bytes"] = audio.size
+        return transcribe_with_groq(audio_ingest.from_buffer(audio, "answer.wav"))
 
 # ------------------------------
 # Analyze answer
 # ------------------------------
 def analyze_answer(answer_text: str) -> str:
-    prompt = f"""
-    You are an interview coach analyzing this answer:
-    "{answer_text}"
-
-    Provide:
-    1. Corrected grammar version
-    2. 2 short suggestions to improve clarity or confidence
-    3. Score out of 10 for communication & relevance
-    Keep the response short and easy to understand.
-    """
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a professional English and communication coach."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
-        return response.choices[0].message.content.strip()
+        return ai_logic.analyze_answer(answer_text)
+    except Exception as e:
+        return session_results.Failed(f"⚠️ Error analyzing answer: {str(e)}")
+
+def analyze_answer_stream(answer_text: str):
+    try:
+        yield from ai_logic.analyze_answer_stream(answer_text)
     except Exception as e:
-        return f"⚠️ Error analyzing answer: {str(e)}"
+        yield session_results.Failed(f"⚠️ Error analyzing answer: {str(e)}")
 
 # ------------------------------
 # Suggest sample answer
@@ -94,24 +58,37 @@ def get_suggestion(question: str, role: str, level: str):
     The answer should sound like a {level} applying for a {role}.
     """
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You give short and practical example interview answers."},
-                {"role": "user", "content": prompt}
-            ],
+        return llm_gateway.ask(
+            prompt,
+            system="You give short and practical example interview answers.",
             max_tokens=200
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         return f"⚠️ Error generating suggestion: {str(e)}"
 
+# ------------------------------
+# Record the answered question
+# ------------------------------
+def record_answer(feedback: str):
+    """Counts one answered question as practice, scored from the feedback."""
+    started = st.session_state.get("question_started", time.time())
+    session_manager.update_practice(
+        st.session_state.user["id"],
+        session_manager.elapsed_minutes(started),
+        ai_logic.score_from_feedback(feedback),
+        activity="interview"
+    )
+
 # ------------------------------
 # Main Interactive Voice Practice
 # ------------------------------
 def voice_practice():
     st.title("🎙️ AI-Powered Mock Interview")
 
+    if not llm_gateway.has_api_key():
+        st.error("❌ GROQ_API_KEY not found. Please set it in .env file.")
+        st.stop()
+
     role = st.text_input("Enter your interview role (e.g., Data Scientist, Frontend Developer):")
     difficulty = st.radio("Select difficulty level:", ["Easy", "Medium", "Hard"])
 
@@ -126,6 +103,7 @@ def voice_practice():
             if st.button("🚀 Start Interview"):
                 st.session_state.active = True
                 st.session_state.question = generate_question(role, difficulty)
+                st.session_state.question_started = time.time()
                 st.rerun()
 
         if st.session_state.active:
@@ -135,21 +113,29 @@ def voice_practice():
             audio_bytes = st.audio_input("🎤 Record your answer here:")
 
             if audio_bytes:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpfile:
-                    tmpfile.write(audio_bytes.getbuffer())
-                    audio_path = tmpfile.name
-
                 st.success("✅ Audio recorded successfully!")
 
-                user_answer = transcribe_with_groq(audio_path)
-                st.write("🧾 You said:")
-                st.info(user_answer)
-
-                feedback = analyze_answer(user_answer)
-                st.session_state.feedback = feedback
-
-                st.subheader("💬 AI Feedback:")
-                st.write(feedback)
+                # The recording survives reruns: transcribe and score it only once.
+                user_answer = session_results.remember(
+                    "interview_transcript",
+                    audio_bytes.getbuffer(),
+                    lambda: transcribe_recording(audio_bytes)
+                )
+                if isinstance(user_answer, session_results.Failed):
+                    # Nothing to grade: don't send the error text for feedback.
+                    st.error(user_answer)
+                else:
+                    st.write("🧾 You said:")
+                    st.info(user_answer)
+
+                    st.subheader("💬 AI Feedback:")
+                    feedback = session_results.stream_once(
+                        "interview_feedback",
+                        user_answer,
+                        lambda: analyze_answer_stream(user_answer),
+                        on_result=record_answer
+                    )
+                    st.session_state.feedback = feedback
 
             st.markdown("---")
             st.subheader("💡 Need Help Answering?")
@@ -165,6 +151,7 @@ def voice_practice():
             with col1:
                 if st.button("Next Question ▶️"):
                     st.session_state.question = generate_question(role, difficulty)
+                    st.session_state.question_started = time.time()
                     st.session_state.feedback = None
                     st.session_state.suggestion = None
                     st.rerun()